@@ -1,48 +1,149 @@
 import streamlit as st
-import tempfile
 import os
 
-from utils.model_whisper import transcribe_audio
-from utils.model_sailor2 import predict_fraud_sailor2
-from utils.model_qwen2 import predict_fraud_qwen2
+from utils import cascade, prefilter, telemetry
+from utils.pipeline import STAGES, run_analysis
+from utils.model_whisper import WHISPER_MODEL_ID
+from utils.model_sailor2 import MODEL_ID as SAILOR2_MODEL_ID
+from utils.model_qwen2 import MODEL_ID as QWEN2_MODEL_ID
+from utils.model_cache import ModelCache
+from utils.result_cache import ResultCache, content_hash
+
+# Jumlah hasil analisis yang disimpan, dan folder opsional untuk menyimpannya ke disk
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "128"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache(max_entries=RESULT_CACHE_SIZE, persist_dir=RESULT_CACHE_DIR)
+
+
+@st.cache_resource
+def get_model_cache() -> ModelCache:
+    """Cache SQLite per model (lihat MODEL_CACHE_PATH), dipakai bersama batch_score."""
+    return ModelCache()
+
+
+def show_prediction(slot, result: dict):
+    with slot.container():
+        st.markdown(f"**Prediction:** {'1 (Fraud)' if result['fraud'] else '0 (Not Fraud)'}")
+        st.markdown(f"**Raw model output:** {result['raw_pred']}")
+        if "fraud_prob" in result:
+            st.markdown(f"**Fraud probability:** {result['fraud_prob']:.3f}")
+        if result.get("prefilter"):
+            st.caption("Decided by the lightweight pre-filter; Sailor2 was skipped.")
+
+
+def show_result(slots: dict, stage: str, value):
+    if stage == "transcript":
+        slots["transcript"].code(value, language="text")
+        slots["sailor2"].info("Predicting with Sailor2...")
+    elif stage == "qwen2" and value is None:
+        slots["qwen2"].info("Skipped: Sailor2 was confident (fraud probability outside the cascade band).")
+    else:
+        show_prediction(slots[stage], value)
+
+
+def result_cache_key(audio_bytes: bytes, cascade_band=None, use_prefilter=False) -> str:
+    """
+    Key hasil analisis: isi file, mode, dan versi model yang aktif, sehingga
+    checkpoint/prompt baru tidak memakai verdict lama dari RESULT_CACHE_DIR.
+    """
+    model_ids = [WHISPER_MODEL_ID, SAILOR2_MODEL_ID, QWEN2_MODEL_ID]
+    key = content_hash(audio_bytes)
+    if cascade_band is not None:
+        # Hasil cascade (Qwen2-Audio bisa dilewati) disimpan terpisah per band
+        key += f":cascade-{cascade_band[0]:.2f}-{cascade_band[1]:.2f}"
+    if use_prefilter:
+        key += ":prefilter"
+        model_ids.append(prefilter.model_id())
+    # Model id berisi "/" dan ":", jadi di-hash agar tetap aman sebagai nama file
+    return key + ":models-" + content_hash("|".join(model_ids).encode("utf-8"))[:16]
+
+
+def analyze(audio_bytes: bytes, slots: dict, cascade_band=None, use_prefilter=False) -> dict:
+    # Audio di-decode sekali di memori; Whisper -> Sailor2 dan Qwen2-Audio berjalan
+    # paralel (atau berurutan di mode cascade) dan hasilnya ditampilkan begitu siap
+    return run_analysis(
+        audio_bytes,
+        on_result=lambda stage, value: show_result(slots, stage, value),
+        cache=get_model_cache(),
+        cascade_band=cascade_band,
+        use_prefilter=use_prefilter,
+    )
+
 
 st.set_page_config(page_title="Fraud Call Detector", layout="centered")
 st.title("Fraud Call Detector")
 st.markdown("Upload a `.wav`, `.mp3`, or `.mp4` file to analyze and classify fraud using Whisper, Sailor2, and Qwen2-Audio.")
 
+with st.sidebar:
+    use_cascade = st.checkbox(
+        "Cascade mode", value=cascade.CASCADE_ENABLED,
+        help="Run Qwen2-Audio only when the Sailor2 fraud probability falls inside the band below.",
+    )
+    band = st.slider("Uncertainty band", 0.0, 1.0, cascade.DEFAULT_BAND, step=0.05, disabled=not use_cascade)
+    cascade_band = tuple(band) if use_cascade else None
+    # Hanya tersedia jika model pre-filter sudah dilatih (python -m utils.prefilter)
+    use_prefilter = os.path.exists(prefilter.PREFILTER_PATH) and st.checkbox(
+        "Pre-filter", value=prefilter.PREFILTER_ENABLED,
+        help="Skip Sailor2 for transcripts the lightweight n-gram model finds clearly benign.",
+    )
+
 uploaded_file = st.file_uploader("Upload audio or video file", type=["wav", "mp3", "mp4", "ogg", "m4a"])
 
 if uploaded_file:
-    # Simpan file upload ke temp
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-        tmp.write(uploaded_file.read())
-        audio_path = tmp.name
+    audio_bytes = uploaded_file.getvalue()
 
     st.markdown("### Listen to the audio")
-    st.audio(audio_path, format="audio/wav", start_time=0)
-
-    with st.spinner("Transcribing with Whisper..."):
-        transcript = transcribe_audio(audio_path)
+    st.audio(audio_bytes, format="audio/wav", start_time=0)
 
     st.markdown("### Transcript (from Whisper)")
-    st.code(transcript, language="text")
-
-    with st.spinner("Predicting with Sailor2..."):
-        sailor2_result = predict_fraud_sailor2(transcript)
-
-    with st.spinner("Predicting with Qwen2-Audio..."):
-        qwen2_result = predict_fraud_qwen2(audio_path)
+    slots = {"transcript": st.empty()}
 
     st.markdown("### Results Comparison")
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Qwen2-Audio")
-        st.markdown(f"**Prediction:** {'1 (Fraud)' if qwen2_result['fraud'] else '0 (Not Fraud)'}")
-        st.markdown(f"**Raw model output:** {qwen2_result['raw_pred']}")
+        slots["qwen2"] = st.empty()
     with col2:
         st.subheader("Whisper + Sailor2")
-        st.markdown(f"**Prediction:** {'1 (Fraud)' if sailor2_result['fraud'] else '0 (Not Fraud)'}")
-        st.markdown(f"**Raw model output:** {sailor2_result['raw_pred']}")
+        slots["sailor2"] = st.empty()
+
+    # File yang sama (isi identik) langsung memakai hasil sebelumnya
+    result_cache = get_result_cache()
+    cache_key = result_cache_key(audio_bytes, cascade_band, use_prefilter)
+    result = result_cache.get(cache_key)
+    if result is None:
+        # Model di-load lazy oleh model_registry saat stage-nya benar-benar dijalankan
+        # (sekali per proses), jadi hit di cache hasil maupun cache model tidak perlu load
+        slots["transcript"].info("Transcribing with Whisper...")
+        slots["qwen2"].info("Waiting for Sailor2..." if cascade_band else "Predicting with Qwen2-Audio...")
+        slots["sailor2"].info("Waiting for transcript...")
+        result = analyze(audio_bytes, slots, cascade_band, use_prefilter)
+        result_cache.put(cache_key, result)
+        if result["cached"]:
+            st.caption(f"Reused stored output for: {', '.join(result['cached'])}.")
+    else:
+        st.caption("Loaded cached result for this file.")
+        for stage in STAGES:
+            show_result(slots, stage, result[stage])
+
+    if "cascade" in result:
+        verdict = result["cascade"]
+        st.markdown(
+            f"**Cascade verdict:** {'1 (Fraud)' if verdict['fraud'] else '0 (Not Fraud)'} "
+            f"(from {'Qwen2-Audio' if verdict['source'] == 'qwen2' else 'Sailor2'})"
+        )
+
+    lexicon_result = result.get("lexicon")
+    if lexicon_result and lexicon_result["matches"]:
+        with st.expander(f"Fraud keywords (risk {lexicon_result['risk']:.2f})"):
+            for match in lexicon_result["matches"]:
+                st.markdown(f"- `{match['text']}` ({match['category']}, weight {match['weight']:.2f})")
 
-    # Clean up temp file
-    os.remove(audio_path)
\ No newline at end of file
+    with st.expander("Stage timings"):
+        st.json(result["timings"])
+        st.caption("Model spans and counters since the app started")
+        st.json(telemetry.snapshot())
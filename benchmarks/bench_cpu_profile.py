@@ -0,0 +1,83 @@
+"""
+Bandingkan profil Sailor2 "default" (float16 di GPU / float32 di CPU) dengan
+profil "cpu" (dynamic quantization int8): ukuran model, kenaikan RSS,
+latensi per panggilan dan kecocokan prediksi.
+
+Thread dan torch.compile diatur lewat env TORCH_THREADS,
+TORCH_INTEROP_THREADS dan TORCH_COMPILE=1.
+
+Contoh:
+    TORCH_THREADS=8 python benchmarks/bench_cpu_profile.py --calls 20
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.cpu_profile import model_size_mb
+from utils.model_sailor2 import PROMPT_TEMPLATE, _class_probs, load_sailor2
+
+TRANSCRIPT = (
+    "Selamat pagi, kami dari HaloBCA. Berbicara dengan Bapak Wijoyo? Pagi. Iya, saya sendiri. "
+    "Baik Bapak Wijoyo, kami informasikan sesuai kebijakan baru Bank Indonesia, per besok biaya "
+    "transaksi bulanan Bapak akan berubah menjadi seratus lima puluh ribu rupiah per bulan."
+)
+
+
+def current_rss() -> int:
+    try:
+        import psutil
+    except ImportError:
+        # Tanpa psutil: baca /proc (Linux); jumlah halaman resident x ukuran halaman
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return psutil.Process().memory_info().rss
+
+
+def bench(profile: str, calls: int) -> dict:
+    gc.collect()
+    rss_before = current_rss()
+    start = time.perf_counter()
+    m = load_sailor2(profile)
+    load_time = time.perf_counter() - start
+    rss_after = current_rss()
+
+    inputs = m.tokenizer(PROMPT_TEMPLATE.format(TRANSCRIPT), return_tensors="pt").to(m.model.device)
+    _class_probs(m, inputs)  # warmup (dan kompilasi jika TORCH_COMPILE=1)
+    latencies = []
+    for _ in range(calls):
+        t = time.perf_counter()
+        probs = _class_probs(m, inputs)[0]
+        latencies.append(time.perf_counter() - t)
+    ms = np.array(latencies) * 1000
+    return {
+        "load_s": load_time,
+        "size_mb": model_size_mb(getattr(m.model, "_orig_mod", m.model)),
+        "rss_mb": (rss_after - rss_before) / 2**20,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "fraud_prob": float(probs[1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--profiles", default="default,cpu")
+    args = parser.parse_args()
+
+    print(f"{'profil':8s} {'load':>7s} {'model':>10s} {'+RSS':>10s} {'p50':>9s} {'p95':>9s} {'fraud_prob':>10s}")
+    for profile in args.profiles.split(","):
+        r = bench(profile, args.calls)
+        print(f"{profile:8s} {r['load_s']:6.1f}s {r['size_mb']:7.0f} MB {r['rss_mb']:7.0f} MB "
+              f"{r['p50_ms']:6.1f} ms {r['p95_ms']:6.1f} ms {r['fraud_prob']:10.4f}")
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
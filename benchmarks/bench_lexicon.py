@@ -0,0 +1,98 @@
+"""
+Throughput utils.lexicon: transkrip/detik untuk pemindaian transkrip utuh,
+pemindaian streaming per potongan teks, dan pembanding naif (satu regex per
+pola atas teks huruf kecil, tanpa normalisasi bilangan/sinonim).
+
+Transkrip diambil dari kolom transcription di dataset.csv; tanpa --dataset
+dipakai transkrip sintetis dari pola DEFAULT_LEXICON dan kalimat pengisi.
+
+Contoh:
+    python benchmarks/bench_lexicon.py
+    python benchmarks/bench_lexicon.py --dataset dataset_creation/dataset.csv --chunk-chars 40
+"""
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.lexicon import LexiconMatcher, load_lexicon
+
+FILLER = (
+    "halo selamat siang iya bu saya mau konfirmasi pesanan paketnya sudah sampai "
+    "terima kasih nanti saya kabari lagi ya jadwal dokter besok jam sembilan pagi"
+).split()
+
+
+def synthetic_transcripts(lexicon: dict, n: int, words: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    patterns = [pattern for entries in lexicon.values() for pattern in entries]
+    transcripts = []
+    for _ in range(n):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        # Sekitar separuh transkrip berisi beberapa pola penipuan
+        if rng.random() < 0.5:
+            for _ in range(rng.randint(1, 3)):
+                tokens.insert(rng.randrange(len(tokens)), rng.choice(patterns))
+        transcripts.append(" ".join(tokens))
+    return transcripts
+
+
+def timed(fn, transcripts: list) -> float:
+    start = time.perf_counter()
+    for text in transcripts:
+        fn(text)
+    return len(transcripts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="dataset.csv dari create_dataset.py")
+    parser.add_argument("--num", type=int, default=5000, help="Jumlah transkrip sintetis")
+    parser.add_argument("--words", type=int, default=300, help="Panjang transkrip sintetis (kata)")
+    parser.add_argument("--chunk-chars", type=int, default=60, help="Ukuran potongan teks mode streaming")
+    args = parser.parse_args()
+
+    lexicon = load_lexicon()
+    start = time.perf_counter()
+    matcher = LexiconMatcher(lexicon)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    if args.dataset:
+        with open(args.dataset, newline="", encoding="utf-8") as f:
+            transcripts = [row["transcription"] for row in csv.DictReader(f) if row.get("transcription")]
+    else:
+        transcripts = synthetic_transcripts(lexicon, args.num, args.words)
+    mean_chars = sum(map(len, transcripts)) / len(transcripts)
+    print(f"{len(matcher.patterns)} pola, automaton dibangun dalam {build_ms:.1f} ms")
+    print(f"{len(transcripts)} transkrip, rata-rata {mean_chars:.0f} karakter")
+
+    def streaming(text):
+        scanner = matcher.scanner()
+        for i in range(0, len(text), args.chunk_chars):
+            scanner.feed(text[i:i + args.chunk_chars])
+        scanner.finish()
+        return scanner.result()
+
+    naive_patterns = [
+        re.compile(r"\b" + re.escape(pattern) + r"\b")
+        for entries in lexicon.values() for pattern in entries
+    ]
+
+    def naive(text):
+        lowered = text.lower()
+        return [p for p in naive_patterns if p.search(lowered)]
+
+    matched = sum(bool(matcher.scan(text)["matches"]) for text in transcripts)
+    print(f"Transkrip dengan minimal satu pola: {matched} ({matched / len(transcripts):.1%})")
+    for name, fn in (("utuh", matcher.scan), (f"streaming/{args.chunk_chars}", streaming), ("naif regex", naive)):
+        rate = timed(fn, transcripts)
+        print(f"  {name:14s} {rate:10.0f} transkrip/detik  {rate * mean_chars / 1e6:6.2f} MB/detik")
+
+
+if __name__ == "__main__":
+    main()
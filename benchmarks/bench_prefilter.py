@@ -0,0 +1,63 @@
+"""
+Latensi utils.prefilter di CPU per transkrip untuk beberapa ukuran batch,
+serta berapa banyak transkrip yang tidak perlu diteruskan ke Sailor2.
+
+Transkrip diambil dari kolom transcription di dataset.csv. Jika ada kolom
+label, dilaporkan juga berapa panggilan penipuan yang ikut tersaring.
+
+Contoh:
+    python -m utils.prefilter dataset_creation/dataset.csv --output prefilter.npz
+    PREFILTER_PATH=prefilter.npz python benchmarks/bench_prefilter.py --dataset dataset_creation/dataset.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.prefilter import predict_proba, prefilter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True, help="dataset.csv dari create_dataset.py")
+    parser.add_argument("--batch-sizes", default="1,16,256,1024")
+    parser.add_argument("--min-transcripts", type=int, default=5000,
+                        help="Jumlah transkrip minimum yang diskor per ukuran batch")
+    args = parser.parse_args()
+
+    with open(args.dataset, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("transcription")]
+    transcripts = [row["transcription"] for row in rows]
+    m = prefilter.get()
+    predict_proba(transcripts[:16])  # warmup
+
+    mean_words = np.mean([len(t.split()) for t in transcripts])
+    print(f"{len(transcripts)} transkrip (rata-rata {mean_words:.0f} kata), threshold {m.threshold:.4f}")
+    for batch_size in map(int, args.batch_sizes.split(",")):
+        # Batch disiapkan sebelum timer agar yang diukur hanya pre-filter
+        num_batches = -(-args.min_transcripts // batch_size)
+        cycled = transcripts * -(-num_batches * batch_size // len(transcripts))
+        batches = [cycled[i * batch_size:(i + 1) * batch_size] for i in range(num_batches)]
+        done, start = 0, time.perf_counter()
+        for batch in batches:
+            predict_proba(batch)
+            done += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"  batch {batch_size:5d}: {elapsed / done * 1e6:8.1f} us/transkrip  {done / elapsed:10.0f} transkrip/detik")
+
+    probs = predict_proba(transcripts)
+    skipped = probs < m.threshold
+    print(f"Tidak diteruskan ke Sailor2: {skipped.mean():.1%}")
+    if rows[0].get("label") not in (None, ""):
+        labels = np.array([int(row["label"]) for row in rows])
+        print(f"Penipuan yang ikut tersaring: {int((skipped & (labels == 1)).sum())} dari {int((labels == 1).sum())}")
+        print(f"Akurasi pre-filter (threshold 0.5): {((probs >= 0.5) == (labels == 1)).mean():.3f}")
+
+
+if __name__ == "__main__":
+    main()
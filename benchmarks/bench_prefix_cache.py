@@ -0,0 +1,84 @@
+"""
+Latensi Sailor2 (mode logits) untuk transkrip pendek dengan dan tanpa
+KV cache prefix prompt. Pada transkrip pendek sebagian besar token input
+adalah instruksi prompt yang konstan, sehingga di situ efek cache paling
+terlihat. Dengan --audio, Qwen2-Audio ikut diukur dengan cara yang sama.
+
+Contoh:
+    python benchmarks/bench_prefix_cache.py --calls 20
+    python benchmarks/bench_prefix_cache.py --audio audio-testing/voice_481914.aac
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.audio_processing import decode_audio
+from utils.model_sailor2 import _encode, _score_ids, sailor2
+
+TRANSCRIPTS = [
+    "Halo, selamat siang.",
+    "Pak, kode OTP-nya tolong dibacakan sekarang.",
+    "Iya Bu, paketnya sudah sampai tadi pagi.",
+    "Rekening Bapak akan diblokir jika tidak transfer hari ini.",
+]
+
+
+def measure(fn, inputs: list, calls: int):
+    fn(inputs[0])  # warmup
+    latencies, outputs = [], []
+    for i in range(calls):
+        t = time.perf_counter()
+        outputs.append(fn(inputs[i % len(inputs)]))
+        latencies.append(time.perf_counter() - t)
+    ms = np.array(latencies) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 95)), outputs
+
+
+def compare(name: str, m, fn, inputs: list, calls: int, same):
+    """Jalankan fn tanpa lalu dengan prefix cache pada bundle model m."""
+    cache = m.prefix_cache
+    m.prefix_cache = None
+    base = measure(fn, inputs, calls)
+    m.prefix_cache = cache
+    cached = measure(fn, inputs, calls)
+    match = all(same(a, b) for a, b in zip(base[2], cached[2]))
+    print(f"{name:8s} tanpa cache p50 {base[0]:7.1f} ms p95 {base[1]:7.1f} ms | "
+          f"dengan cache p50 {cached[0]:7.1f} ms p95 {cached[1]:7.1f} ms "
+          f"({base[0] / cached[0]:.2f}x) | prediksi sama: {match}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--audio", nargs="*", default=[], help="File audio untuk mengukur Qwen2-Audio")
+    args = parser.parse_args()
+
+    m = sailor2.get()
+    if m.prefix_cache is None:
+        sys.exit("Prefix cache Sailor2 nonaktif (SAILOR2_PREFIX_CACHE=0)")
+    lengths = [len(ids) for ids in _encode(m, TRANSCRIPTS)]
+    print(f"Prefix Sailor2: {m.prefix_len} token, sisa per transkrip: {min(lengths)}-{max(lengths)} token")
+    compare(
+        "sailor2", m,
+        lambda t: _score_ids(m, _encode(m, [t]))[0],
+        TRANSCRIPTS, args.calls,
+        lambda a, b: int(a.argmax()) == int(b.argmax()) and abs(float(a[1] - b[1])) < 1e-3,
+    )
+
+    if args.audio:
+        from utils.model_qwen2 import _predict_arrays, qwen2
+
+        q = qwen2.get()
+        if q.prefix_cache is None:
+            sys.exit("Prefix cache Qwen2 nonaktif (QWEN2_PREFIX_CACHE=0)")
+        audios = [decode_audio(path) for path in args.audio]
+        compare("qwen2", q, lambda a: _predict_arrays([a])[0], audios, args.calls, lambda a, b: a == b)
+
+
+if __name__ == "__main__":
+    main()
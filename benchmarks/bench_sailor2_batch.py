@@ -0,0 +1,61 @@
+"""
+Benchmark throughput Sailor2: loop per transkrip vs predict_fraud_sailor2_batch.
+
+Contoh:
+    python benchmarks/bench_sailor2_batch.py --dataset dataset_creation/dataset.csv --limit 256 --batch-size 16
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_sailor2 import predict_fraud_sailor2, predict_fraud_sailor2_batch
+
+SAMPLE_TRANSCRIPT = (
+    "Selamat siang, dengan Ibu Rina? Iya benar, ini siapa ya? Saya Budi dari J&T Express, Bu. "
+    "Mau konfirmasi paket, sepertinya alamat Ibu kurang jelas di sistem kami."
+)
+
+
+def load_transcripts(path, limit):
+    if not path:
+        return [SAMPLE_TRANSCRIPT * (1 + i % 4) for i in range(limit)]
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row["transcription"] for row in csv.DictReader(f)]
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="CSV dengan kolom 'transcription' (default: transkrip contoh)")
+    parser.add_argument("--limit", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    transcripts = load_transcripts(args.dataset, args.limit)
+    n = len(transcripts)
+
+    # Warmup agar kernel/allocator tidak ikut terhitung
+    predict_fraud_sailor2(transcripts[0])
+
+    start = time.perf_counter()
+    loop_results = [predict_fraud_sailor2(t) for t in transcripts]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = predict_fraud_sailor2_batch(transcripts, batch_size=args.batch_size)
+    batch_time = time.perf_counter() - start
+
+    agree = sum(a["fraud"] == b["fraud"] for a, b in zip(loop_results, batch_results))
+    print(f"Transkrip        : {n}")
+    print(f"Loop per item    : {loop_time:.2f}s ({n / loop_time:.2f} transkrip/s)")
+    print(f"Batch (bs={args.batch_size:<3})   : {batch_time:.2f}s ({n / batch_time:.2f} transkrip/s)")
+    print(f"Speedup          : {loop_time / batch_time:.2f}x")
+    print(f"Prediksi sama    : {agree}/{n}")
+
+
+if __name__ == "__main__":
+    main()
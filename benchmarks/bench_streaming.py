@@ -0,0 +1,103 @@
+"""
+Benchmark mode streaming pada file contoh: waktu proses per chunk, real-time
+factor, waktu sampai alert pertama, dan perbandingan dengan skor offline
+(transkripsi penuh lalu Sailor2 sekali).
+
+Contoh:
+    python benchmarks/bench_streaming.py --audio audio-testing/voice_481914.aac --socket
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.audio_processing import SAMPLE_RATE, decode_audio
+from utils.model_whisper import transcribe_audio
+from utils.model_sailor2 import predict_fraud_sailor2
+from utils.streaming import StreamingFraudDetector, pcm_chunks_from_file, pcm_chunks_from_socket
+
+
+def serve_pcm(path: str, chunk_seconds: float, realtime: bool) -> int:
+    """Kirim audio sebagai PCM s16le lewat socket lokal (pengganti SIP tap). Returns port."""
+    pcm = (np.clip(decode_audio(path), -1, 1) * 32767).astype(np.int16).tobytes()
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    step = int(chunk_seconds * SAMPLE_RATE) * 2
+
+    def run():
+        conn, _ = server.accept()
+        with conn:
+            for start in range(0, len(pcm), step):
+                conn.sendall(pcm[start:start + step])
+                if realtime:
+                    time.sleep(chunk_seconds)
+        server.close()
+
+    threading.Thread(target=run, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", default="audio-testing/voice_481914.aac")
+    parser.add_argument("--chunk-seconds", type=float, default=1.0)
+    parser.add_argument("--step-seconds", type=float, default=5.0)
+    parser.add_argument("--score-every", type=float, default=10.0)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--socket", action="store_true", help="Baca chunk lewat socket TCP lokal")
+    parser.add_argument("--realtime", action="store_true", help="Kirim chunk dengan kecepatan real-time (hanya --socket)")
+    args = parser.parse_args()
+
+    if args.socket:
+        port = serve_pcm(args.audio, args.chunk_seconds, args.realtime)
+        chunks = pcm_chunks_from_socket("127.0.0.1", port, args.chunk_seconds)
+    else:
+        chunks = pcm_chunks_from_file(args.audio, args.chunk_seconds)
+
+    detector = StreamingFraudDetector(
+        step_seconds=args.step_seconds,
+        score_every_seconds=args.score_every,
+        threshold=args.threshold,
+    )
+    # Warmup agar waktu load model tidak ikut terhitung
+    predict_fraud_sailor2("halo")
+    transcribe_audio(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    chunk_times = []
+    first_alert = None
+    start = time.perf_counter()
+    for chunk in chunks:
+        t = time.perf_counter()
+        for event in detector.feed(chunk):
+            if event["type"] == "score":
+                print(f"[{event['t']:7.2f}s audio] fraud_prob={event['fraud_prob']:.3f}")
+            elif event["type"] == "alert" and first_alert is None:
+                first_alert = event["t"]
+                print(f"[{event['t']:7.2f}s audio] ALERT")
+        chunk_times.append(time.perf_counter() - t)
+    final = detector.finish()[-1]
+    stream_time = time.perf_counter() - start
+
+    t = time.perf_counter()
+    offline = predict_fraud_sailor2(transcribe_audio(args.audio))
+    offline_time = time.perf_counter() - t
+
+    chunk_ms = np.array(chunk_times) * 1000
+    print()
+    print(f"Durasi audio          : {detector.elapsed:.2f}s")
+    print(f"Waktu proses stream   : {stream_time:.2f}s (RTF {stream_time / detector.elapsed:.3f})")
+    print(f"Per chunk p50/p95/max : {np.percentile(chunk_ms, 50):.1f} / {np.percentile(chunk_ms, 95):.1f} / {chunk_ms.max():.1f} ms")
+    print(f"Alert pertama         : {'-' if first_alert is None else f'{first_alert:.2f}s audio'}")
+    print(f"Prob. akhir streaming : {final['fraud_prob']}")
+    print(f"Prob. offline         : {offline['fraud_prob']:.3f} ({offline_time:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Bandingkan real-time factor (waktu proses / durasi audio) jalur Whisper saat ini
+(openai-whisper, tanpa VAD) dengan backend yang bisa dikonfigurasi + VAD.
+
+Percakapan sintetis dari generateAudio.py berisi jeda hening 2 detik antar
+giliran bicara; --insert-silence-ms menyisipkan jeda serupa ke file contoh.
+
+Contoh:
+    python benchmarks/bench_whisper_rtf.py --backend faster-whisper --compute-type int8 --threads 4
+    python benchmarks/bench_whisper_rtf.py --audio a.wav b.wav --insert-silence-ms 0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.evaluate import word_error_rate
+from utils.audio_processing import SAMPLE_RATE, decode_audio, remove_silence
+from utils.model_whisper import load_backend
+
+
+def with_gaps(y: np.ndarray, silence_ms: int, every_seconds: float) -> np.ndarray:
+    if silence_ms <= 0:
+        return y
+    step = int(every_seconds * SAMPLE_RATE)
+    gap = np.zeros(int(SAMPLE_RATE * silence_ms / 1000), dtype=y.dtype)
+    parts = []
+    for start in range(0, len(y), step):
+        parts += [y[start:start + step], gap]
+    return np.concatenate(parts)
+
+
+def run(backend, audios: list, vad: bool, language: str):
+    texts, total, kept = [], 0.0, 0
+    for y in audios:
+        start = time.perf_counter()
+        x = remove_silence(y) if vad else y
+        texts.append(backend.transcribe(x, language)["text"] if len(x) else "")
+        total += time.perf_counter() - start
+        kept += len(x)
+    return texts, total, kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", default=["audio-testing/voice_481914.aac"])
+    parser.add_argument("--baseline-model", default="base")
+    parser.add_argument("--backend", default="faster-whisper", choices=["openai", "faster-whisper"])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--no-vad", action="store_true")
+    parser.add_argument("--insert-silence-ms", type=int, default=2000)
+    parser.add_argument("--every", type=float, default=5.0, help="Sisipkan jeda setiap N detik audio")
+    parser.add_argument("--language", default="indonesian")
+    args = parser.parse_args()
+
+    audios = [with_gaps(decode_audio(path), args.insert_silence_ms, args.every) for path in args.audio]
+    audio_seconds = sum(len(y) for y in audios) / SAMPLE_RATE
+    warmup = audios[0][:SAMPLE_RATE * 5]
+
+    baseline = load_backend("openai", args.baseline_model)
+    baseline.transcribe(warmup, args.language)
+    base_texts, base_time, _ = run(baseline, audios, vad=False, language=args.language)
+    del baseline
+
+    candidate = load_backend(args.backend, args.model, args.compute_type, args.threads)
+    candidate.transcribe(warmup, args.language)
+    cand_texts, cand_time, kept = run(candidate, audios, vad=not args.no_vad, language=args.language)
+
+    label = f"{args.backend}/{args.model}" + ("" if args.backend == "openai" else f"/{args.compute_type}")
+    label += "" if args.no_vad else " + VAD"
+    print(f"Durasi audio          : {audio_seconds:.1f}s ({len(audios)} file)")
+    print(f"Baseline openai/{args.baseline_model:<6}: {base_time:.2f}s  RTF {base_time / audio_seconds:.3f}")
+    print(f"{label:<22}: {cand_time:.2f}s  RTF {cand_time / audio_seconds:.3f}  ({base_time / cand_time:.2f}x)")
+    print(f"Audio setelah VAD     : {kept / SAMPLE_RATE:.1f}s ({kept / SAMPLE_RATE / audio_seconds * 100:.0f}%)")
+    print(f"WER vs baseline       : {word_error_rate(base_texts, cand_texts):.3f}")
+
+
+if __name__ == "__main__":
+    main()
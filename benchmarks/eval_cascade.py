@@ -0,0 +1,136 @@
+"""
+Evaluasi mode cascade (utils.cascade) pada split held-out dari dataset.csv:
+berapa banyak komputasi Qwen2-Audio yang dihemat dan berapa akurasi yang
+hilang untuk beberapa band ketidakpastian.
+
+Sailor2 dan Qwen2-Audio dijalankan sekali pada setiap sampel (dengan latensi
+per panggilan), lalu setiap band disimulasikan dari hasil tersebut. Baris
+"always" (band 0-1: Qwen2-Audio menentukan semua panggilan) adalah jalur
+penuh tanpa gate; "sailor2" adalah jalur teks saja. Selisih akurasi/F1
+dihitung terhadap jalur penuh.
+
+Dengan --results, hasil utils.batch_score (JSONL berisi label, sailor2 dan
+qwen2 tanpa --cascade) dipakai ulang tanpa menjalankan model; komputasi
+yang dihemat lalu dilaporkan sebagai jumlah panggilan Qwen2-Audio saja.
+
+Contoh:
+    python benchmarks/eval_cascade.py --dataset dataset_creation/dataset.csv --limit 50
+    python benchmarks/eval_cascade.py --results results.jsonl --bands 0.3-0.7,0.2-0.8,0.1-0.9
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import cascade
+
+
+def parse_bands(text: str) -> list:
+    bands = []
+    for part in text.split(","):
+        low, high = part.split("-")
+        bands.append((float(low), float(high)))
+    return bands
+
+
+def run_models(dataset: str, limit: int, seed: int) -> list:
+    """Sailor2 (transkrip dataset) dan Qwen2-Audio untuk setiap sampel held-out, dengan latensi."""
+    from benchmarks.evaluate import held_out_split, load_dataset
+    from utils.audio_processing import decode_audio
+    from utils.model_sailor2 import predict_fraud_sailor2
+    from utils.model_qwen2 import predict_fraud_qwen2
+
+    rows = held_out_split(load_dataset(dataset), seed=seed)[:limit]
+    records = []
+    for i, row in enumerate(rows):
+        audio = decode_audio(row["file"])
+        if i == 0:
+            # Warmup supaya waktu load model tidak ikut terhitung
+            predict_fraud_sailor2(row["transcription"])
+            predict_fraud_qwen2(audio)
+        t = time.perf_counter()
+        sailor2 = predict_fraud_sailor2(row["transcription"])
+        sailor2_s = time.perf_counter() - t
+        t = time.perf_counter()
+        qwen2 = predict_fraud_qwen2(audio)
+        qwen2_s = time.perf_counter() - t
+        records.append({"label": row["label"], "sailor2": sailor2, "qwen2": qwen2,
+                        "sailor2_s": sailor2_s, "qwen2_s": qwen2_s})
+    return records
+
+
+def load_results(path: str) -> list:
+    """Baris utils.batch_score yang lengkap (tanpa error, ada label dan kedua verdict)."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "error" in record or record.get("label") in (None, "") or not record.get("qwen2"):
+                continue
+            records.append({"label": int(record["label"]), "sailor2": record["sailor2"], "qwen2": record["qwen2"]})
+    return records
+
+
+def evaluate_band(records: list, band) -> dict:
+    """Metrik cascade untuk satu band; band None = jalur teks saja."""
+    from benchmarks.evaluate import classification_metrics
+
+    if band is None:
+        escalated = [False] * len(records)
+        preds = [r["sailor2"]["fraud"] for r in records]
+    else:
+        verdicts = [cascade.decide(r["sailor2"], r["qwen2"], band) for r in records]
+        escalated = [v["escalated"] for v in verdicts]
+        preds = [v["fraud"] for v in verdicts]
+    result = classification_metrics([r["label"] for r in records], preds)
+    result["escalation_rate"] = sum(escalated) / len(records)
+    if all("qwen2_s" in r for r in records):
+        full = sum(r["sailor2_s"] + r["qwen2_s"] for r in records)
+        spent = sum(r["sailor2_s"] + (r["qwen2_s"] if e else 0.0) for r, e in zip(records, escalated))
+        result["compute_s"] = spent
+        result["compute_saved"] = 1 - spent / full if full else 0.0
+    else:
+        result["compute_saved"] = 1 - result["escalation_rate"]  # proporsi panggilan Qwen2-Audio
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dataset", help="dataset.csv dari create_dataset.py")
+    source.add_argument("--results", help="JSONL dari utils.batch_score (tanpa --cascade)")
+    parser.add_argument("--bands", default="0.4-0.6,0.3-0.7,0.2-0.8,0.1-0.9",
+                        help="Daftar band LOW-HIGH dipisah koma")
+    parser.add_argument("--limit", type=int, help="Batasi jumlah sampel held-out")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Tulis hasil ke file JSON ini")
+    args = parser.parse_args()
+
+    records = load_results(args.results) if args.results else run_models(args.dataset, args.limit, args.seed)
+    if not records:
+        sys.exit("Tidak ada sampel berlabel dengan hasil Sailor2 dan Qwen2-Audio")
+
+    rows = {"always": evaluate_band(records, (0.0, 1.0)), "sailor2": evaluate_band(records, None)}
+    for band in parse_bands(args.bands):
+        rows[f"{band[0]:g}-{band[1]:g}"] = evaluate_band(records, band)
+
+    full = rows["always"]
+    print(f"Cascade pada {len(records)} sampel (selisih terhadap jalur penuh 'always'):")
+    print(f"  {'band':8s} {'eskalasi':>9s} {'hemat':>7s} {'acc':>6s} {'Δacc':>7s} {'F1':>6s} {'ΔF1':>7s}")
+    for name, r in rows.items():
+        print(f"  {name:8s} {r['escalation_rate']:9.1%} {r['compute_saved']:7.1%} {r['accuracy']:6.3f}"
+              f" {r['accuracy'] - full['accuracy']:+7.3f} {r['f1']:6.3f} {r['f1'] - full['f1']:+7.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"num_samples": len(records), "bands": rows}, f, indent=2)
+        print(f"Hasil ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
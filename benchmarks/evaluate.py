@@ -0,0 +1,275 @@
+"""
+Evaluasi kualitas dan latensi model pada split held-out dari dataset.csv.
+
+Untuk setiap model (Whisper, Sailor2, Qwen2-Audio) dilaporkan:
+akurasi/F1 (WER untuk Whisper), latensi p50/p95/p99, throughput,
+serta puncak RSS dan VRAM. Model sebelumnya dilepas dari memori sebelum
+model berikutnya dijalankan, dan memori dilaporkan juga sebagai selisih
+terhadap kondisi sebelum model di-load. Hasil ditulis ke JSON agar bisa dibandingkan
+antar-run (--baseline menampilkan selisihnya).
+
+Bisa dijalankan di CPU dengan checkpoint kecil, mis.:
+    WHISPER_MODEL=tiny SAILOR2_MODEL_PATH=path/ke/sailor2-kecil QWEN2_MODEL_PATH=path/ke/qwen2-kecil \\
+        python benchmarks/evaluate.py --dataset dataset_creation/dataset.csv --limit 20
+
+Contoh:
+    python benchmarks/evaluate.py --dataset dataset_creation/dataset.csv --output bench_results.json
+    python benchmarks/evaluate.py --dataset dataset_creation/dataset.csv --baseline bench_results.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import torch
+
+from utils import model_registry
+from utils.audio_processing import decode_audio
+from utils.model_whisper import WHISPER_MODEL, transcribe_audio
+from utils.model_sailor2 import MODEL_PATH as SAILOR2_MODEL_PATH, predict_fraud_sailor2
+from utils.model_qwen2 import MODEL_PATH as QWEN2_MODEL_PATH, predict_fraud_qwen2
+
+MODELS = ("whisper", "sailor2", "qwen2")
+
+
+def load_dataset(path: str) -> list:
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["label"] = int(row["label"])
+        if not os.path.isabs(row["file"]) and not os.path.exists(row["file"]):
+            row["file"] = os.path.join(base_dir, row["file"])
+    return rows
+
+
+def held_out_split(rows: list, seed: int = 42) -> list:
+    """
+    Split test 10% seperti di notebook fine-tune (80/10/10, stratified,
+    random_state=42). Jika scikit-learn tidak terpasang, dipakai split
+    stratified sederhana dengan seed yang sama.
+    """
+    labels = [row["label"] for row in rows]
+    try:
+        from sklearn.model_selection import train_test_split
+    except ImportError:
+        rng = random.Random(seed)
+        test = []
+        for label in sorted(set(labels)):
+            group = [row for row in rows if row["label"] == label]
+            rng.shuffle(group)
+            test.extend(group[:max(1, round(len(group) * 0.1))])
+        return test
+    _, temp, _, temp_labels = train_test_split(rows, labels, test_size=0.2, random_state=seed, stratify=labels)
+    _, test = train_test_split(temp, test_size=0.5, random_state=seed, stratify=temp_labels)
+    return test
+
+
+def classification_metrics(y_true: list, y_pred: list) -> dict:
+    tp = sum(t == 1 and p == 1 for t, p in zip(y_true, y_pred))
+    fp = sum(t == 0 and p == 1 for t, p in zip(y_true, y_pred))
+    fn = sum(t == 1 and p == 0 for t, p in zip(y_true, y_pred))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "accuracy": sum(t == p for t, p in zip(y_true, y_pred)) / len(y_true),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def word_error_rate(references: list, hypotheses: list) -> float:
+    errors = words = 0
+    for ref, hyp in zip(references, hypotheses):
+        r, h = ref.lower().split(), hyp.lower().split()
+        # Edit distance level kata, satu baris DP
+        dist = list(range(len(h) + 1))
+        for i in range(1, len(r) + 1):
+            prev, dist[0] = dist[0], i
+            for j in range(1, len(h) + 1):
+                prev, dist[j] = dist[j], min(dist[j] + 1, dist[j - 1] + 1, prev + (r[i - 1] != h[j - 1]))
+        errors += dist[len(h)]
+        words += len(r)
+    return errors / words if words else 0.0
+
+
+def _proc_status_mb(field: str):
+    """Nilai field (mis. VmRSS, VmHWM) dari /proc/self/status dalam MB; None di luar Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset puncak RSS proses (VmHWM) lewat /proc/self/clear_refs; False jika tidak didukung."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb() -> float:
+    rss = _proc_status_mb("VmRSS")
+    return rss if rss is not None else peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    # ru_maxrss dalam KB di Linux, byte di macOS; tidak bisa di-reset
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_model(fn, inputs: list) -> dict:
+    """
+    Panggil fn untuk tiap input (setelah 1x warmup) dan catat latensi, RSS, VRAM.
+    Semua model yang sudah di-load dilepas lebih dulu sehingga puncak memori
+    (dan selisihnya terhadap sebelum load, *_delta_mb) hanya milik model ini.
+    """
+    model_registry.unload()
+    rss_before = current_rss_mb()
+    rss_reset = reset_peak_rss()
+    vram_before = torch.cuda.memory_allocated() if torch.cuda.is_available() else 0
+    if torch.cuda.is_available():
+        torch.cuda.reset_peak_memory_stats()
+    fn(inputs[0])  # warmup, termasuk load model
+    outputs, latencies = [], []
+    start = time.perf_counter()
+    for x in inputs:
+        t = time.perf_counter()
+        outputs.append(fn(x))
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    peak_rss = peak_rss_mb()
+    return {
+        "outputs": outputs,
+        "latency_ms": {
+            "p50": float(np.percentile(ms, 50)),
+            "p95": float(np.percentile(ms, 95)),
+            "p99": float(np.percentile(ms, 99)),
+            "mean": float(ms.mean()),
+        },
+        "throughput_per_s": len(inputs) / total,
+        "peak_rss_mb": peak_rss,
+        "peak_rss_delta_mb": peak_rss - rss_before,
+        # False: puncak RSS tidak bisa di-reset (non-Linux), jadi bisa berasal dari model sebelumnya
+        "peak_rss_reset": rss_reset,
+        "peak_vram_mb": torch.cuda.max_memory_allocated() / 2**20 if torch.cuda.is_available() else None,
+        "peak_vram_delta_mb": (torch.cuda.max_memory_allocated() - vram_before) / 2**20
+        if torch.cuda.is_available() else None,
+    }
+
+
+def git_commit() -> str:
+    try:
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        proc = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=repo_dir)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_comparison(report: dict, baseline: dict):
+    print("\nPerbandingan dengan baseline:")
+    for name, current in report["models"].items():
+        previous = baseline.get("models", {}).get(name)
+        if not previous:
+            continue
+        for key in ("accuracy", "f1", "wer"):
+            if key in current and key in previous:
+                print(f"  {name:8s} {key:10s} {previous[key]:.4f} -> {current[key]:.4f}")
+        for key in ("p50", "p95"):
+            old, new = previous["latency_ms"][key], current["latency_ms"][key]
+            print(f"  {name:8s} {key + ' ms':10s} {old:.1f} -> {new:.1f} ({(new - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True, help="dataset.csv dari create_dataset.py")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="File hasil run sebelumnya untuk dibandingkan")
+    parser.add_argument("--models", default=",".join(MODELS), help="Subset model, mis. whisper,sailor2")
+    parser.add_argument("--limit", type=int, help="Batasi jumlah sampel held-out")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    models = args.models.split(",")
+    rows = held_out_split(load_dataset(args.dataset), seed=args.seed)[:args.limit]
+    labels = [row["label"] for row in rows]
+    print(f"Evaluasi {len(rows)} sampel held-out: {', '.join(models)}")
+
+    # Decode sekali di depan agar latensi model tidak tercampur waktu decode
+    audios = [decode_audio(row["file"]) for row in rows] if {"whisper", "qwen2"} & set(models) else None
+    audio_seconds = sum(len(a) for a in audios) / 16000 if audios else None
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "host": platform.node(),
+        "device": torch.cuda.get_device_name(0) if torch.cuda.is_available() else "cpu",
+        "torch": torch.__version__,
+        "num_samples": len(rows),
+        "checkpoints": {"whisper": WHISPER_MODEL, "sailor2": SAILOR2_MODEL_PATH, "qwen2": QWEN2_MODEL_PATH},
+        "models": {},
+    }
+
+    transcripts = [row["transcription"] for row in rows]
+    if "whisper" in models:
+        result = run_model(transcribe_audio, audios)
+        transcripts = result.pop("outputs")
+        result["wer"] = word_error_rate([row["transcription"] for row in rows], transcripts)
+        result["real_time_factor"] = (len(rows) / result["throughput_per_s"]) / audio_seconds
+        report["models"]["whisper"] = result
+
+    if "sailor2" in models:
+        result = run_model(predict_fraud_sailor2, transcripts)
+        preds = [out["fraud"] for out in result.pop("outputs")]
+        result.update(classification_metrics(labels, preds))
+        # Transkrip dari Whisper jika ikut dijalankan, selain itu dari dataset
+        result["transcript_source"] = "whisper" if "whisper" in models else "dataset"
+        report["models"]["sailor2"] = result
+
+    if "qwen2" in models:
+        result = run_model(predict_fraud_qwen2, audios)
+        preds = [out["fraud"] for out in result.pop("outputs")]
+        result.update(classification_metrics(labels, preds))
+        report["models"]["qwen2"] = result
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in report["models"].items():
+        quality = f"WER {result['wer']:.3f}" if "wer" in result else f"acc {result['accuracy']:.3f} F1 {result['f1']:.3f}"
+        lat = result["latency_ms"]
+        print(f"{name:8s} {quality} | p50 {lat['p50']:.1f} ms p95 {lat['p95']:.1f} ms p99 {lat['p99']:.1f} ms"
+              f" | {result['throughput_per_s']:.2f}/s | RSS {result['peak_rss_mb']:.0f} MB"
+              f" (+{result['peak_rss_delta_mb']:.0f} MB untuk model ini)")
+    print(f"Hasil ditulis ke {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
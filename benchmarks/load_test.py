@@ -0,0 +1,95 @@
+"""
+Load generator untuk utils/server.py: kirim request secara konkuren dan
+laporkan throughput, latensi p50/p95/p99 serta jumlah tiap status HTTP
+(503 = ditolak karena antrian penuh, 504 = timeout).
+
+Jalankan server lebih dulu, mis.:
+    python -m utils.server --port 8000
+
+Contoh:
+    python benchmarks/load_test.py --endpoint transcript --requests 200 --concurrency 16
+    python benchmarks/load_test.py --endpoint audio --audio audio-testing/voice_481914.aac --concurrency 4
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+TRANSCRIPTS = [
+    "Halo, selamat siang. Iya Bu, paketnya sudah sampai tadi pagi.",
+    "Selamat pagi, kami dari bank. Rekening Bapak akan diblokir, mohon sebutkan kode OTP yang masuk.",
+    "Pak, besok jadi ketemu di kantor jam sembilan kan?",
+    "Anda memenangkan undian, silakan transfer biaya administrasi lima ratus ribu ke rekening berikut.",
+]
+
+
+def send(url: str, data: bytes, content_type: str, timeout: float):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError) as e:
+        status = f"error: {getattr(e, 'reason', e)}"
+    return status, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", default="transcript", choices=["transcript", "audio"])
+    parser.add_argument("--audio", nargs="+", default=["audio-testing/voice_481914.aac"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout sisi client (detik)")
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/v1/score/{args.endpoint}"
+    if args.endpoint == "transcript":
+        payloads = [json.dumps({"transcript": t}).encode() for t in TRANSCRIPTS]
+        content_type = "application/json"
+    else:
+        payloads = []
+        for path in args.audio:
+            with open(path, "rb") as f:
+                payloads.append(f.read())
+        content_type = "application/octet-stream"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(send, url, payloads[i % len(payloads)], content_type, args.timeout)
+            for i in range(args.requests)
+        ]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    ok = np.array([latency for status, latency in results if status == 200]) * 1000
+    print(f"{args.requests} request ke {url}, concurrency {args.concurrency}, {wall:.1f}s")
+    print(f"Status       : {dict(statuses)}")
+    if len(ok):
+        print(f"Throughput   : {len(ok) / wall:.2f} request sukses/s")
+        print(f"Latensi (200): p50 {np.percentile(ok, 50):.1f} ms  p95 {np.percentile(ok, 95):.1f} ms"
+              f"  p99 {np.percentile(ok, 99):.1f} ms")
+    try:
+        with urllib.request.urlopen(f"{args.url.rstrip('/')}/health", timeout=10) as response:
+            queues = json.load(response)["queues"]
+        for name, q in queues.items():
+            print(f"{name:8s} batch: {q['batches']} x rata-rata {q['avg_batch_size']} item")
+    except (urllib.error.URLError, KeyError):
+        pass
+    sys.exit(0 if statuses.get(200) else 1)
+
+
+if __name__ == "__main__":
+    main()
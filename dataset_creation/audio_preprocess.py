@@ -1,16 +1,121 @@
-import librosa
-import soundfile as sf
+"""
+Resample semua WAV di audio_dataset_azure/ ke 16 kHz mono dan simpan di
+preprocessed_file/. File dikerjakan paralel di process pool, dan file yang
+hasilnya sudah up to date dilewati, sehingga run ulang hanya memproses
+file baru atau yang berubah.
+
+Contoh:
+    python audio_preprocess.py
+    python audio_preprocess.py --workers 8 --check hash
+"""
+import argparse
+import hashlib
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_processing import SAMPLE_RATE, preprocess_audio
+
+# Menyimpan hash isi file input per nama file (mode --check hash)
+INDEX_FILENAME = ".preprocess_index.json"
+# Index ditulis ulang setiap sekian file selesai, supaya run yang terputus
+# tidak mengulang file yang sudah diproses
+INDEX_FLUSH_EVERY = 100
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def save_index(index, index_path):
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+
+def is_up_to_date(entry, output_path, check, index):
+    """Mode mtime: output lebih baru dari input. Mode hash: hash input sama dengan saat diproses."""
+    if not os.path.exists(output_path):
+        return False
+    if check == "mtime":
+        return os.stat(output_path).st_mtime >= entry.stat().st_mtime
+    return index.get(entry.name) == file_hash(entry.path)
+
+
+def process_file(input_path, output_path):
+    preprocess_audio(input_path, output_path, target_sr=SAMPLE_RATE)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="audio_dataset_azure")
+    parser.add_argument("--output", default="preprocessed_file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--check", default="mtime", choices=["mtime", "hash"],
+                        help="Cara menentukan output yang masih up to date")
+    parser.add_argument("--force", action="store_true", help="Proses ulang semua file")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    index_path = os.path.join(args.output, INDEX_FILENAME)
+    index = {}
+    if args.check == "hash" and os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+
+    entries = sorted(
+        (entry for entry in os.scandir(args.input) if entry.is_file() and entry.name.endswith('.wav')),
+        key=lambda e: e.name,
+    )
+    todo = [
+        entry for entry in entries
+        if args.force or not is_up_to_date(entry, os.path.join(args.output, entry.name), args.check, index)
+    ]
+    print(f"{len(entries)} file, {len(entries) - len(todo)} sudah up to date, {len(todo)} diproses")
+
+    start = time.perf_counter()
+    failed = 0
+    unsaved = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                (entry, pool.submit(process_file, entry.path, os.path.join(args.output, entry.name)))
+                for entry in todo
+            ]
+            for entry, future in futures:
+                try:
+                    output_file_path = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f'Gagal memproses {entry.path}: {e}')
+                    continue
+                if args.check == "hash":
+                    index[entry.name] = file_hash(entry.path)
+                    unsaved += 1
+                    if unsaved >= INDEX_FLUSH_EVERY:
+                        save_index(index, index_path)
+                        unsaved = 0
+                print(f'Processed and saved: {output_file_path}')
+    finally:
+        # Tetap simpan progres jika run dihentikan (Ctrl-C) atau error
+        if args.check == "hash" and unsaved:
+            save_index(index, index_path)
 
-file_name = os.listdir('audio_dataset_azure')
+    elapsed = time.perf_counter() - start
+    done = len(todo) - failed
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Selesai: {done} file dalam {elapsed:.1f}s ({rate:.2f} file/detik), {failed} gagal")
 
-if not os.path.exists('preprocessed_file'):
-    os.makedirs('preprocessed_file')
 
-for file in file_name:
-    if file.endswith('.wav'):
-        file_path = os.path.join('audio_dataset_azure', file)
-        y, sr = librosa.load(file_path, sr=16000)  
-        output_file_path = os.path.join('preprocessed_file', file) 
-        sf.write(output_file_path, y, 16000) 
-        print(f'Processed and saved: {output_file_path}')
+if __name__ == "__main__":
+    main()
@@ -2,70 +2,165 @@ import pandas as pd
 import argparse
 import os
 import sys
-import uuid 
-import csv
+import wave
+
+import soundfile as sf
+
+MANIFEST_COLUMNS = ['file', 'label', 'transcription', 'duration', 'sample_rate', 'size']
+
+
+def scan_audio_dir(audio_dir):
+    """Satu kali scandir: nama file -> os.DirEntry untuk semua WAV di folder."""
+    if not os.path.isdir(audio_dir):
+        return {}
+    return {
+        entry.name: entry
+        for entry in os.scandir(audio_dir)
+        if entry.is_file() and entry.name.endswith('.wav')
+    }
+
+
+def wav_metadata(entry):
+    """
+    Durasi (detik), sample rate dan ukuran file dari header WAV saja, tanpa decode audio.
+    Returns None jika header tidak bisa dibaca (file rusak/terpotong).
+    """
+    try:
+        with wave.open(entry.path, 'rb') as w:
+            frames, sample_rate = w.getnframes(), w.getframerate()
+    except (wave.Error, EOFError):
+        # Modul wave hanya mengerti PCM; format lain (mis. float) lewat header libsndfile
+        try:
+            info = sf.info(entry.path)
+        except RuntimeError:
+            # sf.LibsndfileError adalah turunan RuntimeError
+            return None
+        frames, sample_rate = info.frames, info.samplerate
+    return {
+        'duration': round(frames / sample_rate, 3) if sample_rate else 0.0,
+        'sample_rate': sample_rate,
+        'size': entry.stat().st_size,
+    }
+
+
+def existing_files(output_path):
+    """Kolom 'file' di manifest yang sudah ada, atau None jika manifest perlu dibuat ulang."""
+    if not os.path.isfile(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+    header = pd.read_csv(output_path, nrows=0).columns.tolist()
+    if header != MANIFEST_COLUMNS:
+        # Manifest format lama (tanpa metadata audio): tulis ulang sekali
+        return None
+    return set(pd.read_csv(output_path, usecols=['file'])['file'])
+
+
+def clean_chunk(df, audio_dir):
+    df = df[['id', 'dialog', 'label']].copy()
+    df['dialog'] = df['dialog'].astype(str).str.replace('\n', ' ', regex=False) \
+                               .str.replace(r'\w+:\s*', '', regex=True) \
+                               .str.replace(r'\s+', ' ', regex=True) \
+                               .str.strip()
+    df.rename(columns={'dialog': 'transcription'}, inplace=True)
+    df['file'] = df['id'].apply(lambda x: f'{audio_dir}/dialog_{x}.wav')
+    return df
+
 
 def main():
     """
     Mempersiapkan dataset untuk klasifikasi audio.
 
     Skrip ini akan:
-    1. Membaca CSV input.
-    2. Memilih kolom 'id', 'dialog', dan 'label'.
-    3. Membuat kolom 'file' dari 'id' dengan format 'audio/dialog_{id}.wav'.
+    1. Mengindeks folder audio sekali (satu scandir).
+    2. Membaca CSV input per chunk dan memilih kolom 'id', 'dialog', dan 'label'.
+    3. Membuat kolom 'file' dari 'id' dengan format '<audio_dir>/dialog_{id}.wav'.
     4. Membersihkan teks di kolom 'dialog' secara menyeluruh (termasuk menghapus label aktor)
        dan menamainya 'transcription'.
-    5. Memvalidasi keberadaan file audio dan menghapus baris jika file tidak ditemukan.
-    6. Menyimpan hasil ke CSV output dengan kolom: 'file', 'label', 'transcription'.
+    5. Melewati baris yang file audionya tidak ada atau sudah ada di manifest.
+    6. Menambahkan durasi, sample rate dan ukuran file dari header WAV.
+    7. Menambahkan (append) baris baru ke CSV output dengan kolom:
+       'file', 'label', 'transcription', 'duration', 'sample_rate', 'size'.
     """
-    try:
-        df = pd.read_csv(
-            "synthetic_dialogs_final.csv",
-            dtype={'id': str},
-        )    
-    except FileNotFoundError:
+    parser = argparse.ArgumentParser(description="Bangun/perbarui manifest dataset.csv secara inkremental.")
+    parser.add_argument("--input", default="synthetic_dialogs_final.csv")
+    parser.add_argument("--audio-dir", default="audio_dataset_azure")
+    parser.add_argument("--output", default="dataset.csv")
+    parser.add_argument("--parquet", help="Tulis juga manifest lengkap ke file Parquet ini")
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--rebuild", action="store_true", help="Tulis ulang manifest dari awal")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.input):
         print(f"Error: File input tidak ditemukan", file=sys.stderr)
         sys.exit(1)
 
     required_columns = ['id', 'dialog', 'label']
-    if not all(col in df.columns for col in required_columns):
+    header = pd.read_csv(args.input, nrows=0).columns
+    if not all(col in header for col in required_columns):
         print(f"Error: CSV input harus memiliki kolom: {', '.join(required_columns)}", file=sys.stderr)
         sys.exit(1)
 
-    df = df[required_columns].copy()
-
-    print("Membersihkan teks dialog (menghapus label aktor)...")
-
-    df['dialog'] = df['dialog'].str.replace('\n', ' ', regex=False) \
-                               .str.replace(r'\w+:\s*', '', regex=True) \
-                               .str.replace(r'\s+', ' ', regex=True) \
-                               .str.strip()
+    audio_index = scan_audio_dir(args.audio_dir)
+    audio_names = set(audio_index)
+    print(f"{len(audio_index)} file audio di {args.audio_dir}")
 
-    df.rename(columns={'dialog': 'transcription'}, inplace=True)
+    done = None if args.rebuild else existing_files(args.output)
+    if done is None:
+        print(f"Menulis ulang {args.output} dari awal...")
+        if os.path.exists(args.output):
+            os.remove(args.output)
+        done = set()
+    write_header = not os.path.exists(args.output)
 
-    df['file'] = df['id'].apply(lambda x: f'audio_dataset_azure/dialog_{x}.wav')
+    added = missing_count = corrupt_count = 0
+    missing_files, corrupt_files = [], []
+    print("Membersihkan teks dialog (menghapus label aktor) dan memvalidasi file audio...")
+    for chunk in pd.read_csv(args.input, dtype={'id': str}, chunksize=args.chunksize):
+        df = clean_chunk(chunk, args.audio_dir)
+        names = df['file'].map(os.path.basename)
+        exists_mask = names.isin(audio_names)
+        missing_count += int((~exists_mask).sum())
+        missing_files.extend(df.loc[~exists_mask, 'file'].tolist()[:5 - len(missing_files)])
 
-    df = df[['file', 'label', 'transcription']]
+        df = df[exists_mask & ~df['file'].isin(done)]
+        if df.empty:
+            continue
+        metadata = [wav_metadata(audio_index[os.path.basename(path)]) for path in df['file']]
+        valid_mask = pd.Series([meta is not None for meta in metadata], index=df.index)
+        corrupt_count += int((~valid_mask).sum())
+        corrupt_files.extend(df.loc[~valid_mask, 'file'].tolist()[:5 - len(corrupt_files)])
 
-    print("Memvalidasi keberadaan file audio...")
-    exists_mask = df['file'].apply(os.path.isfile)
+        df = df[valid_mask]
+        if df.empty:
+            continue
+        metadata = pd.DataFrame([meta for meta in metadata if meta is not None], index=df.index)
+        df = pd.concat([df, metadata], axis=1)[MANIFEST_COLUMNS]
+        df.to_csv(args.output, mode='a', header=write_header, index=False, encoding='utf-8')
+        write_header = False
+        done.update(df['file'])
+        added += len(df)
 
-    if not exists_mask.all():
-        missing_count = (~exists_mask).sum()
-        missing_files = df.loc[~exists_mask, 'file'].tolist()
+    if missing_count:
         print(f"Peringatan: {missing_count} file tidak ditemukan dan akan dilewati:", file=sys.stderr)
-
-        for path in missing_files[:5]: 
+        for path in missing_files:
             print(f"  • {path}", file=sys.stderr)
         if missing_count > 5:
             print(f"  • ... dan {missing_count - 5} lainnya.", file=sys.stderr)
-        
-        df = df[exists_mask]
+    if corrupt_count:
+        print(f"Peringatan: {corrupt_count} file audio rusak (header tidak terbaca) dan akan dilewati:", file=sys.stderr)
+        for path in corrupt_files:
+            print(f"  • {path}", file=sys.stderr)
+        if corrupt_count > 5:
+            print(f"  • ... dan {corrupt_count - 5} lainnya.", file=sys.stderr)
 
-    df.to_csv("dataset.csv", index=False, encoding='utf-8')
-    print(f"✔ Berhasil menulis {len(df)} entri ke dataset.csv")
-    if 'missing_count' in locals() and missing_count > 0:
+    print(f"✔ Berhasil menambahkan {added} entri baru ke {args.output} (total {len(done)})")
+    if missing_count > 0:
         print(f"Total {missing_count} entri dilewati karena file audio tidak ditemukan.")
+    if corrupt_count > 0:
+        print(f"Total {corrupt_count} entri dilewati karena file audio rusak.")
+
+    if args.parquet:
+        pd.read_csv(args.output).to_parquet(args.parquet, index=False)
+        print(f"✔ Manifest juga ditulis ke {args.parquet}")
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,17 @@ import pandas as pd
 import os
 import re
 import shutil
-import azure.cognitiveservices.speech as speechsdk
-from pydub import AudioSegment
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import numpy as np
 import logging
 from dotenv import load_dotenv
+
+from rate_limit import RetryableError, TokenBucket, bounded_submit, with_retry
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,6 +24,28 @@ SILENCE_BETWEEN_CLIPS_MS = 2000
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
 
+# "azure" atau "stub" (nada sintetis lokal, untuk uji coba tanpa Azure)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "azure")
+# Jumlah baris yang disintesis bersamaan (semua dialog) dan jumlah dialog yang diproses bersamaan
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "8"))
+TTS_DIALOG_WORKERS = int(os.getenv("TTS_DIALOG_WORKERS", "4"))
+# Batas request TTS per detik (0 = tanpa batas) dan jumlah percobaan ulang
+TTS_RATE_PER_SEC = float(os.getenv("TTS_RATE_PER_SEC", "10"))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "5"))
+# Sample rate output: Azure langsung mengirim PCM 16-bit mono tanpa header
+# pada rate ini, jadi default 16 kHz tidak perlu di-resample lagi oleh audio_preprocess.py
+TTS_SAMPLE_RATE = int(os.getenv("TTS_SAMPLE_RATE", "16000"))
+AZURE_PCM_FORMATS = {
+    8000: "Raw8Khz16BitMonoPcm",
+    16000: "Raw16Khz16BitMonoPcm",
+    22050: "Raw22050Hz16BitMonoPcm",
+    24000: "Raw24Khz16BitMonoPcm",
+    44100: "Raw44100Hz16BitMonoPcm",
+    48000: "Raw48Khz16BitMonoPcm",
+}
+# File di bawah ukuran ini dianggap rusak dan dibuat ulang
+MIN_VALID_FILE_BYTES = 1024
+
 VOICE_CONFIG = {
     'penipu': 'id-ID-ArdiNeural',  
     'korban': 'id-ID-GadisNeural',
@@ -24,67 +53,130 @@ VOICE_CONFIG = {
     'penelepon': 'id-ID-ArdiNeural',  
 }
 
-def create_speech_synthesizer(voice_name, output_path):
-    """Membuat dan mengonfigurasi SpeechSynthesizer."""
-    speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
-    
-    speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm)
-    speech_config.speech_synthesis_voice_name = voice_name
-    
-    audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
-    
-    return speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
+class AzureTTS:
+    """
+    Sintesis Azure TTS ke memori (tanpa file sementara).
+    Satu SpeechSynthesizer per voice per thread dipakai ulang untuk semua baris.
+    """
+
+    def __init__(self):
+        import azure.cognitiveservices.speech as speechsdk
+
+        if TTS_SAMPLE_RATE not in AZURE_PCM_FORMATS:
+            raise ValueError(f"TTS_SAMPLE_RATE {TTS_SAMPLE_RATE} tidak didukung Azure; pilih dari {sorted(AZURE_PCM_FORMATS)}")
+        self.sdk = speechsdk
+        self.output_format = getattr(speechsdk.SpeechSynthesisOutputFormat, AZURE_PCM_FORMATS[TTS_SAMPLE_RATE])
+        self.local = threading.local()
+        # Error sementara dari service yang layak dicoba ulang
+        self.retryable_codes = {
+            speechsdk.CancellationErrorCode.TooManyRequests,
+            speechsdk.CancellationErrorCode.ServiceTimeout,
+            speechsdk.CancellationErrorCode.ServiceUnavailable,
+            speechsdk.CancellationErrorCode.ConnectionFailure,
+        }
+
+    def synthesizer(self, voice_name):
+        cache = self.local.__dict__.setdefault("synthesizers", {})
+        if voice_name not in cache:
+            speech_config = self.sdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
+            speech_config.set_speech_synthesis_output_format(self.output_format)
+            speech_config.speech_synthesis_voice_name = voice_name
+            # audio_config=None: audio dikembalikan di result.audio_data, tidak diputar/ditulis ke file
+            cache[voice_name] = self.sdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        return cache[voice_name]
+
+    def synthesize(self, text, voice_name) -> bytes:
+        """Kembalikan PCM 16-bit mono pada TTS_SAMPLE_RATE; RetryableError untuk error sementara."""
+        result = self.synthesizer(voice_name).speak_text_async(text).get()
+        if result.reason == self.sdk.ResultReason.SynthesizingAudioCompleted:
+            return result.audio_data
+        if result.reason == self.sdk.ResultReason.Canceled:
+            details = result.cancellation_details
+            message = f"Sintesis suara dibatalkan: {details.reason} {details.error_details or ''}".strip()
+            if details.reason == self.sdk.CancellationReason.Error and details.error_code in self.retryable_codes:
+                raise RetryableError(message)
+            raise RuntimeError(message)
+        raise RuntimeError(f"Sintesis suara gagal karena: {result.reason}")
 
-def synthesize_text_to_wav(synthesizer, text):
-    """Menggunakan Azure TTS untuk mengubah teks menjadi file audio WAV."""
-    if not text or not text.strip():
-        logging.warning("Teks kosong dilewati.")
-        return False
-        
-    try:
-        result = synthesizer.speak_text_async(text).get()
-        
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            return True
-        elif result.reason == speechsdk.ResultReason.Canceled:
-            cancellation_details = result.cancellation_details
-            logging.error(f"Sintesis suara dibatalkan: {cancellation_details.reason}")
-            if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                logging.error(f"Detail error: {cancellation_details.error_details}")
-            return False
-        else:
-            logging.error(f"Sintesis suara gagal karena: {result.reason}")
-            return False
-            
-    except Exception as e:
-        logging.error(f"Terjadi error saat sintesis: {e}", exc_info=True)
-        return False
 
-def check_missing_files(df):
+class StubTTS:
+    """
+    Pengganti Azure untuk uji coba offline: nada sinus dengan durasi sesuai
+    panjang teks, latensi buatan, dan (opsional) kegagalan sementara acak.
+    """
+
+    def __init__(self, latency_s: float = 0.2, fail_rate: float = 0.0):
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.rng = np.random.default_rng(0)
+        self.lock = threading.Lock()
+
+    def synthesize(self, text, voice_name) -> bytes:
+        time.sleep(self.latency_s)
+        with self.lock:
+            fail = self.rng.random() < self.fail_rate
+        if fail:
+            raise RetryableError("Stub: TooManyRequests")
+        duration = 0.06 * len(text)
+        t = np.arange(int(TTS_SAMPLE_RATE * duration)) / TTS_SAMPLE_RATE
+        freq = 120 if "Ardi" in voice_name else 220
+        return (np.sin(2 * np.pi * freq * t) * 8000).astype("<i2").tobytes()
+
+
+def create_tts(backend=TTS_BACKEND):
+    if backend == "azure":
+        return AzureTTS()
+    if backend == "stub":
+        return StubTTS(
+            latency_s=float(os.getenv("TTS_STUB_LATENCY", "0.2")),
+            fail_rate=float(os.getenv("TTS_STUB_FAIL_RATE", "0")),
+        )
+    raise ValueError(f"Unknown TTS backend: {backend}")
+
+
+def synthesize_line(tts, rate_limiter, text, voice_name) -> bytes:
+    """Satu baris dialog -> PCM, dengan rate limit dan retry + backoff."""
+    def attempt():
+        rate_limiter.acquire()
+        return tts.synthesize(text, voice_name)
+    return with_retry(attempt, max_retries=TTS_MAX_RETRIES)
+
+def scan_output_sizes(folder=OUTPUT_AUDIO_FOLDER):
+    """Satu kali scandir: nama file WAV -> ukuran (bytes)."""
+    if not os.path.isdir(folder):
+        return {}
+    sizes = {}
+    for entry in os.scandir(folder):
+        if entry.name.endswith(".wav") and entry.is_file():
+            try:
+                sizes[entry.name] = entry.stat().st_size
+            except OSError as e:
+                # File yang tidak bisa dibaca diperlakukan seperti file rusak
+                logging.error(f"Error membaca file {entry.name}: {e}")
+                sizes[entry.name] = 0
+    return sizes
+
+def check_missing_files(df, sizes=None):
     """
     Memeriksa file audio mana yang hilang atau rusak dari folder output.
+    Folder output hanya di-scan sekali (lihat scan_output_sizes); sizes bisa
+    diberikan jika hasil scan sudah ada.
     Returns list of dialog IDs yang perlu dibuat ulang.
     """
-    missing_files = []
-    corrupted_files = []
-    
-    for _, row in df.iterrows():
-        dialogue_id = row['id'] 
-        output_file_path = os.path.join(OUTPUT_AUDIO_FOLDER, f"dialog_{dialogue_id}.wav")
-        
-        if not os.path.exists(output_file_path):
-            missing_files.append(dialogue_id)
-            logging.info(f"File hilang: dialog_{dialogue_id}.wav")
-        else:
-            try:
-                file_size = os.path.getsize(output_file_path)
-                if file_size < 1024:  
-                    corrupted_files.append(dialogue_id)
-                    logging.warning(f"File mungkin rusak (ukuran {file_size} bytes): dialog_{dialogue_id}.wav")
-            except Exception as e:
-                corrupted_files.append(dialogue_id)
-                logging.error(f"Error membaca file dialog_{dialogue_id}.wav: {e}")
-    
+    if sizes is None:
+        sizes = scan_output_sizes()
+
+    file_sizes = df['id'].map(lambda dialogue_id: sizes.get(f"dialog_{dialogue_id}.wav"))
+    missing_mask = file_sizes.isna()
+    corrupted_mask = ~missing_mask & (file_sizes < MIN_VALID_FILE_BYTES)
+    missing_files = df.loc[missing_mask, 'id'].tolist()
+    corrupted_files = df.loc[corrupted_mask, 'id'].tolist()
+
+    for dialogue_id in missing_files:
+        logging.info(f"File hilang: dialog_{dialogue_id}.wav")
+    for dialogue_id, file_size in zip(corrupted_files, file_sizes[corrupted_mask]):
+        logging.warning(f"File mungkin rusak (ukuran {int(file_size)} bytes): dialog_{dialogue_id}.wav")
+
     total_missing = len(missing_files) + len(corrupted_files)
     
     if missing_files:
@@ -120,70 +212,95 @@ def backup_corrupted_files(corrupted_ids):
         except Exception as e:
             logging.error(f"Gagal membackup file dialog_{dialogue_id}.wav: {e}")
 
-def generate_and_combine_dialogue_audio(dialog_id, dialogue_text, output_path):
-    """
-    Menghasilkan audio untuk setiap baris dialog, lalu menggabungkannya menjadi satu file.
-    Menggunakan folder sementara yang akan dihapus secara otomatis.
-    """
-    logging.info(f"Memproses Dialog ID: {dialog_id}...")
-
-    temp_folder = os.path.join(OUTPUT_AUDIO_FOLDER, f"temp_{dialog_id}")
-    os.makedirs(temp_folder, exist_ok=True)
-
-    try:
-        lines = dialogue_text.strip().split('\n')
-        audio_clip_paths = []
-
-        for i, line in enumerate(lines):
-            match = re.match(r'^\s*(penipu|korban|penerima|penelepon):\s*(.*)', line, re.IGNORECASE)
-            if not match:
-                continue
+def parse_dialogue(dialogue_text):
+    """List (speaker, voice, teks) dari naskah 'speaker: teks' per baris."""
+    parsed = []
+    for line in dialogue_text.strip().split('\n'):
+        match = re.match(r'^\s*(penipu|korban|penerima|penelepon):\s*(.*)', line, re.IGNORECASE)
+        if not match:
+            continue
 
-            speaker, text_to_speak = match.groups()
-            speaker = speaker.lower()
-
-            if not text_to_speak.strip():
-                continue
+        speaker, text_to_speak = match.groups()
+        speaker = speaker.lower()
 
-            voice_name = VOICE_CONFIG.get(speaker)
-            if not voice_name:
-                logging.warning(f"Tidak ada voice config untuk speaker '{speaker}'. Menggunakan default.")
-                voice_name = 'id-ID-ArdiNeural'
+        if not text_to_speak.strip():
+            continue
 
-            temp_clip_path_wav = os.path.join(temp_folder, f"line_{i}.wav")
+        voice_name = VOICE_CONFIG.get(speaker)
+        if not voice_name:
+            logging.warning(f"Tidak ada voice config untuk speaker '{speaker}'. Menggunakan default.")
+            voice_name = 'id-ID-ArdiNeural'
+        parsed.append((speaker, voice_name, text_to_speak))
+    return parsed
 
-            synthesizer = create_speech_synthesizer(voice_name, temp_clip_path_wav)
+def assemble_pcm(clips, sample_rate=TTS_SAMPLE_RATE, silence_ms=SILENCE_BETWEEN_CLIPS_MS):
+    """
+    Gabungkan clip PCM 16-bit mono (bytes) menjadi satu array int16, masing-masing
+    diikuti jeda hening. Panjang total dihitung dulu dari panjang clip sehingga
+    array dialokasikan sekali dan setiap clip disalin tepat satu kali (linear,
+    bukan kuadratik seperti menambah AudioSegment berulang kali).
+    """
+    gap = int(sample_rate * silence_ms / 1000)
+    lengths = [len(pcm) // 2 for pcm in clips]
+    # np.zeros: jeda hening sudah terisi, hanya bagian clip yang ditulis
+    out = np.zeros(sum(lengths) + gap * len(clips), dtype=np.int16)
+    pos = 0
+    for pcm, n in zip(clips, lengths):
+        out[pos:pos + n] = np.frombuffer(pcm, dtype="<i2", count=n)
+        pos += n + gap
+    return out
 
-            success = synthesize_text_to_wav(synthesizer, text_to_speak)
+def write_wav(path, samples, sample_rate=TTS_SAMPLE_RATE):
+    """Tulis int16 mono ke WAV secara atomik (file sementara lalu os.replace)."""
+    tmp_path = f"{path}.tmp"
+    with wave.open(tmp_path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.astype("<i2", copy=False).tobytes())
+    os.replace(tmp_path, path)
 
-            if success and os.path.exists(temp_clip_path_wav):
-                audio_clip_paths.append(temp_clip_path_wav)
-                logging.info(f"  Berhasil: {speaker} - '{text_to_speak[:50]}...'")
-            else:
-                logging.error(f"  Gagal: {speaker} - '{text_to_speak[:50]}...'")
+def generate_and_combine_dialogue_audio(dialog_id, dialogue_text, output_path, tts, line_pool, rate_limiter):
+    """
+    Menghasilkan audio untuk setiap baris dialog, lalu menggabungkannya menjadi satu file.
+    Semua baris dikirim ke line_pool sekaligus sehingga disintesis bersamaan;
+    audio tetap di memori sampai digabung sesuai urutan naskah. Jika ada baris
+    yang gagal, file tidak ditulis dan dialog dihitung gagal (0) agar
+    diregenerasi utuh di run berikutnya.
+    """
+    logging.info(f"Memproses Dialog ID: {dialog_id}...")
 
-        if audio_clip_paths:
-            silence = AudioSegment.silent(duration=SILENCE_BETWEEN_CLIPS_MS)
-            combined_audio = AudioSegment.empty()
+    try:
+        lines = parse_dialogue(dialogue_text)
+        futures = [
+            line_pool.submit(synthesize_line, tts, rate_limiter, text_to_speak, voice_name)
+            for _, voice_name, text_to_speak in lines
+        ]
 
-            for clip_path in audio_clip_paths:
-                clip = AudioSegment.from_wav(clip_path)
-                combined_audio += clip + silence
+        clips = []
+        for (speaker, _, text_to_speak), future in zip(lines, futures):
+            try:
+                pcm = future.result()
+            except Exception as e:
+                logging.error(f"  Gagal: {speaker} - '{text_to_speak[:50]}...': {e}")
+                continue
+            clips.append(pcm)
 
-            combined_audio.export(output_path, format="wav")
-            logging.info(f"Sukses! Audio dialog disimpan di: {output_path}")
-            return True
+        if clips and len(clips) == len(lines):
+            write_wav(output_path, assemble_pcm(clips))
+            logging.info(f"Sukses! Audio dialog ({len(clips)} baris) disimpan di: {output_path}")
+            return len(clips)
         else:
-            logging.warning(f"Tidak ada audio yang berhasil dibuat untuk Dialog ID: {dialog_id}")
-            return False
+            logging.warning(f"Dialog ID {dialog_id} tidak lengkap ({len(clips)}/{len(lines)} baris); tidak disimpan")
+            return 0
 
     except Exception as e:
         logging.error(f"Error saat memproses Dialog ID {dialog_id}: {e}", exc_info=True)
-        return False
+        return 0
 
 def main():
     """Fungsi utama untuk menjalankan seluruh proses."""
-    if not AZURE_SPEECH_KEY or not AZURE_SPEECH_REGION:
+    if TTS_BACKEND == "azure" and (not AZURE_SPEECH_KEY or not AZURE_SPEECH_REGION):
         logging.critical("Error: Environment variable AZURE_SPEECH_KEY dan AZURE_SPEECH_REGION harus diatur!")
         logging.critical("Anda bisa mendapatkannya dari portal Azure di bawah layanan 'Speech Services'.")
         return
@@ -199,7 +316,8 @@ def main():
     
     logging.info(f"Memeriksa status file audio untuk {len(df)} dialog...")
     
-    files_to_regenerate = check_missing_files(df)
+    output_sizes = scan_output_sizes()
+    files_to_regenerate = check_missing_files(df, output_sizes)
     
     if not files_to_regenerate:
         logging.info("Tidak ada file yang perlu diregenerasi. Semua file sudah lengkap!")
@@ -212,31 +330,51 @@ def main():
     for speaker, voice in VOICE_CONFIG.items():
         logging.info(f"  {speaker}: {voice}")
     
-    corrupted_files = []
-    for dialogue_id in files_to_regenerate:
-        output_file_path = os.path.join(OUTPUT_AUDIO_FOLDER, f"dialog_{dialogue_id}.wav")
-        if os.path.exists(output_file_path):
-            corrupted_files.append(dialogue_id)
+    corrupted_files = [
+        dialogue_id for dialogue_id in files_to_regenerate
+        if f"dialog_{dialogue_id}.wav" in output_sizes
+    ]
     
     if corrupted_files:
         backup_corrupted_files(corrupted_files)
     
+    tts = create_tts()
+    rate_limiter = TokenBucket(TTS_RATE_PER_SEC)
+    logging.info(f"Backend {TTS_BACKEND}: output {TTS_SAMPLE_RATE} Hz, {TTS_CONCURRENCY} baris paralel, {TTS_DIALOG_WORKERS} dialog paralel, "
+                 f"maks {TTS_RATE_PER_SEC or 'tanpa batas'} request/detik")
+
     success_count = 0
     failed_count = 0
-    
-    for _, row in df_to_process.iterrows():
-        dialogue_id = row['id']
-        dialogue_text = str(row['dialog'])
-        
-        output_file_path = os.path.join(OUTPUT_AUDIO_FOLDER, f"dialog_{dialogue_id}.wav")
-        
-        success = generate_and_combine_dialogue_audio(dialogue_id, dialogue_text, output_file_path)
-        
-        if success:
-            success_count += 1
-        else:
-            failed_count += 1
-    
+    line_count = 0
+    start_time = time.perf_counter()
+
+    # Dua pool terpisah: thread dialog hanya menunggu hasil baris, jadi tidak
+    # pernah memblokir thread yang melakukan sintesis
+    with ThreadPoolExecutor(max_workers=TTS_CONCURRENCY) as line_pool, \
+            ThreadPoolExecutor(max_workers=TTS_DIALOG_WORKERS) as dialog_pool:
+        def process(row):
+            dialogue_id = row['id']
+            output_file_path = os.path.join(OUTPUT_AUDIO_FOLDER, f"dialog_{dialogue_id}.wav")
+            return generate_and_combine_dialogue_audio(
+                dialogue_id, str(row['dialog']), output_file_path, tts, line_pool, rate_limiter,
+            )
+
+        # Dialog di-submit bertahap: saat Ctrl-C/error, dialog yang belum mulai
+        # dibatalkan alih-alih tetap disintesis lewat Azure
+        submitted = bounded_submit(dialog_pool, process, (row for _, row in df_to_process.iterrows()),
+                                   TTS_DIALOG_WORKERS * 2)
+        with closing(submitted):
+            for _, future in submitted:
+                lines_done = future.result()
+                line_count += lines_done
+                if lines_done:
+                    success_count += 1
+                else:
+                    failed_count += 1
+
+    elapsed = time.perf_counter() - start_time
+    logging.info(f"{line_count} baris dalam {elapsed:.1f}s ({line_count / elapsed:.2f} baris/detik)")
+
     logging.info(f"\nProses regenerasi selesai!")
     logging.info(f"Berhasil: {success_count} file")
     logging.info(f"Gagal: {failed_count} file")
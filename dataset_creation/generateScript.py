@@ -3,20 +3,31 @@ import time
 import random
 import re 
 import os
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from dotenv import load_dotenv
 
+from rate_limit import RetryableError, TokenBucket, bounded_submit, with_retry
+
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
 MODEL = "gemini-2.0-flash"  
 CSV_FILENAME = "synthetic_dialogs_final.csv"
 DIALOGS_PER_SCENARIO = 12
+FIELDNAMES = ["id", "kategori_skenario", "detail_skenario", "label", "dialog"]
+
+# "gemini" atau "fake" (client lokal untuk uji coba tanpa API key)
+SCRIPT_BACKEND = os.getenv("SCRIPT_BACKEND", "gemini")
+# Jumlah request yang berjalan bersamaan, batas request per menit, dan percobaan ulang
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+GEMINI_RATE_PER_MIN = float(os.getenv("GEMINI_RATE_PER_MIN", "15"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
 
 fraud_scenarios = {
     "Penipuan Phishing & Malware (APK Paling Viral)": [
-=        "Penipu mengaku dari jasa pengiriman (JNE/J&T/Anteraja), mengirim 'foto resi paket' dalam format file .APK.",
+        "Penipu mengaku dari jasa pengiriman (JNE/J&T/Anteraja), mengirim 'foto resi paket' dalam format file .APK.",
         "Penipu menyebar 'undangan pernikahan digital' atau 'undangan syukuran aqiqah' palsu berformat .APK yang bisa menguras m-banking.",
         "Penipu mengaku dari Kepolisian, mengirimkan 'surat tilang elektronik (e-tilang)' palsu dalam bentuk file .APK.",
         "Penipu mengaku dari PLN/PDAM, mengirim 'tagihan bulanan' atau 'pemberitahuan pemadaman' dalam format file .APK.",
@@ -227,20 +238,86 @@ Detail spesifik: {scenario_detail}
     return final_prompt
 
 
-def generate_dialog(prompt):
-    """Menghasilkan dialog menggunakan Gemini API."""
-    try:
-        model = genai.GenerativeModel(MODEL)
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=2048,
-                top_p=1.0,
-                top_k=40,
-            )
+class GeminiClient:
+    """Client Gemini; error sementara (kuota, timeout, 5xx) dilempar sebagai RetryableError."""
+
+    def __init__(self, model=MODEL):
+        import google.generativeai as genai
+        from google.api_core import exceptions
+
+        genai.configure(api_key=GEMINI_API_KEY)
+        self.genai = genai
+        self.model = genai.GenerativeModel(model)
+        self.transient = (
+            exceptions.ResourceExhausted,
+            exceptions.ServiceUnavailable,
+            exceptions.DeadlineExceeded,
+            exceptions.InternalServerError,
         )
+
+    def generate(self, prompt):
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self.genai.types.GenerationConfig(
+                    temperature=0.7,
+                    max_output_tokens=2048,
+                    top_p=1.0,
+                    top_k=40,
+                )
+            )
+        except self.transient as e:
+            raise RetryableError(f"Gemini: {e}")
         return response.text.strip()
+
+
+class FakeClient:
+    """
+    Pengganti Gemini untuk uji coba offline: dialog pendek dari detail
+    skenario di prompt, dengan latensi dan kegagalan sementara opsional.
+    """
+
+    def __init__(self, latency_s=0.1, fail_rate=0.0):
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.rng = random.Random(0)
+        self.lock = threading.Lock()
+
+    def generate(self, prompt):
+        time.sleep(self.latency_s)
+        with self.lock:
+            fail = self.rng.random() < self.fail_rate
+        if fail:
+            raise RetryableError("Fake: 429 Resource exhausted")
+        detail = prompt.rsplit("Detail spesifik:", 1)[1].split("\n", 1)[0].strip()
+        return (
+            f"**Penelepon:** Halo, selamat siang.\n"
+            f"Penerima: Siang, ada apa ya? (bingung)\n"
+            f"Penelepon: {detail}\n"
+            f"Penerima: Baik, terima kasih."
+        )
+
+
+def create_client(backend=SCRIPT_BACKEND):
+    if backend == "gemini":
+        return GeminiClient()
+    if backend == "fake":
+        return FakeClient(
+            latency_s=float(os.getenv("SCRIPT_FAKE_LATENCY", "0.1")),
+            fail_rate=float(os.getenv("SCRIPT_FAKE_FAIL_RATE", "0")),
+        )
+    raise ValueError(f"Unknown script backend: {backend}")
+
+
+def generate_dialog(prompt, client, rate_limiter=None):
+    """Menghasilkan dialog menggunakan client (Gemini), dengan rate limit dan retry + backoff."""
+    def attempt():
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return client.generate(prompt)
+
+    try:
+        return with_retry(attempt, max_retries=GEMINI_MAX_RETRIES, base_delay=2.0)
     except Exception as e:
         print(f"\nError saat menghubungi Gemini API: {e}")
         return None
@@ -263,65 +340,122 @@ def clean_dialogue(text):
     
     return cleaned_text.strip()
 
-def main():
-    """Fungsi utama untuk membuat dataset dialog."""
+def existing_ids(path):
+    """Id dialog yang sudah ada di CSV, agar run berikutnya melanjutkan dari sana."""
+    if not os.path.isfile(path):
+        return set()
+    ids = set()
+    with open(path, newline='', encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                ids.add(int(row["id"]))
+            except (TypeError, ValueError):
+                continue  # baris terakhir bisa terpotong jika proses mati saat menulis
+    return ids
 
-    start_from_id = 1 
+def sort_csv_by_id(path):
+    """Tulis ulang CSV terurut menurut id (baris dengan id rusak dibuang)."""
+    with open(path, newline='', encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if str(row.get("id") or "").isdigit()]
+    rows.sort(key=lambda row: int(row["id"]))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
 
-    file_exists = os.path.isfile(CSV_FILENAME)
+def build_tasks():
+    """Semua (id, skenario) dengan penomoran id yang sama seperti sebelumnya."""
+    all_scenarios = []
+    for category, details in fraud_scenarios.items():
+        for detail in details:
+            all_scenarios.append({'category': category, 'detail': detail, 'label': 1})
+    for category, details in nonfraud_scenarios.items():
+        for detail in details:
+            all_scenarios.append({'category': category, 'detail': detail, 'label': 0})
+
+    tasks = []
+    dialog_counter = 0
+    for scenario in all_scenarios:
+        for i in range(DIALOGS_PER_SCENARIO):
+            dialog_counter += 1
+            tasks.append((dialog_counter, i, scenario))
+    return tasks
+
+def create_dialog(task, client, rate_limiter):
+    dialog_id, i, scenario = task
+    print(f"  > Membuat dialog ID {dialog_id} (Iterasi ke-{i+1}/{DIALOGS_PER_SCENARIO} untuk skenario: '{scenario['detail']}')")
+    prompt = build_prompt_revised(scenario['category'], scenario['detail'], scenario['label'])
+    return clean_dialogue(generate_dialog(prompt, client, rate_limiter))
+
+def main(client=None):
+    """
+    Fungsi utama untuk membuat dataset dialog.
+    Id yang sudah ada di CSV dilewati; dialog dibuat paralel (dibatasi
+    GEMINI_CONCURRENCY dan GEMINI_RATE_PER_MIN) lalu ditulis berurutan
+    menurut id. Dialog yang gagal tidak ditulis dan dicoba lagi di run berikutnya;
+    jika id hasil coba ulang lebih kecil dari id yang sudah ada, CSV diurutkan
+    ulang menurut id di akhir run.
+    """
+    client = client or create_client()
+    done = existing_ids(CSV_FILENAME)
+    tasks = [task for task in build_tasks() if task[0] not in done]
+    print(f"{len(done)} dialog sudah ada, {len(tasks)} akan dibuat.")
+    if not tasks:
+        return
+
+    rate_limiter = TokenBucket(GEMINI_RATE_PER_MIN / 60)
+    file_exists = os.path.isfile(CSV_FILENAME) and os.path.getsize(CSV_FILENAME) > 0
+    if file_exists:
+        # Pastikan baris baru tidak menyambung ke baris terakhir yang terpotong
+        with open(CSV_FILENAME, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    total_dialogs_generated_this_run = 0
+    first_written = None
+    start = time.perf_counter()
+    with open(CSV_FILENAME, "a", newline='', encoding="utf-8") as csvfile, \
+            ThreadPoolExecutor(max_workers=GEMINI_CONCURRENCY) as pool:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
 
-    with open(CSV_FILENAME, "a", newline='', encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(
-            csvfile,
-            fieldnames=["id", "kategori_skenario", "detail_skenario", "label", "dialog"]
-        )
-        
         if not file_exists:
             writer.writeheader()
-        
-        all_scenarios = []
-        for category, details in fraud_scenarios.items():
-            for detail in details:
-                all_scenarios.append({'category': category, 'detail': detail, 'label': 1})
-        for category, details in nonfraud_scenarios.items():
-            for detail in details:
-                all_scenarios.append({'category': category, 'detail': detail, 'label': 0})
-        
-        dialog_counter = 0
-        total_dialogs_generated_this_run = 0
-
-        for scenario in all_scenarios:
-            for i in range(DIALOGS_PER_SCENARIO):
-                dialog_counter += 1
-                
-                if dialog_counter < start_from_id:
-                    continue
 
+        # Hanya sedikit task yang di-submit di depan: saat Ctrl-C/error, task
+        # yang belum mulai dibatalkan alih-alih tetap memanggil Gemini
+        submitted = bounded_submit(pool, lambda task: create_dialog(task, client, rate_limiter),
+                                   tasks, GEMINI_CONCURRENCY * 2)
+        # Hasil diambil sesuai urutan id, jadi baris tetap berurutan walau selesai acak
+        with closing(submitted):
+            for (dialog_id, _, scenario), future in submitted:
+                final_dialog = future.result()
                 label_text = "Penipuan" if scenario['label'] == 1 else "Normal"
-                print(f"  > Membuat dialog ID {dialog_counter} (Iterasi ke-{i+1}/{DIALOGS_PER_SCENARIO} untuk skenario: '{scenario['detail']}')")
-
-                prompt = build_prompt_revised(scenario['category'], scenario['detail'], scenario['label'])
-                
-                raw_dialog = generate_dialog(prompt)
-                
-                final_dialog = clean_dialogue(raw_dialog)
-                
+
                 if final_dialog:
                     writer.writerow({
-                        "id": dialog_counter,
+                        "id": dialog_id,
                         "kategori_skenario": scenario['category'],
                         "detail_skenario": scenario['detail'],
                         "label": scenario['label'],
                         "dialog": final_dialog
                     })
-                    print(f"  > Dialog {dialog_counter} ({label_text}) berhasil dibuat & dibersihkan.")
+                    csvfile.flush()
+                    print(f"  > Dialog {dialog_id} ({label_text}) berhasil dibuat & dibersihkan.")
                     total_dialogs_generated_this_run += 1
+                    first_written = dialog_id if first_written is None else first_written
                 else:
                     print(f"  > GAGAL membuat atau membersihkan dialog untuk skenario: {scenario['detail']}.")
-                
-                time.sleep(2)
-                
-    print(f"\nSelesai! {total_dialogs_generated_this_run} dialog baru telah dibuat dan ditambahkan ke file '{CSV_FILENAME}'")
+
+    if done and first_written is not None and first_written < max(done):
+        # Id hasil coba ulang tertulis setelah id yang lebih besar dari run sebelumnya
+        sort_csv_by_id(CSV_FILENAME)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nSelesai! {total_dialogs_generated_this_run} dialog baru telah dibuat dan ditambahkan ke file '{CSV_FILENAME}' "
+          f"dalam {elapsed:.1f}s")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
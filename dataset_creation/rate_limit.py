@@ -0,0 +1,77 @@
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Rate limiter thread-safe: rata-rata `rate` panggilan per detik dengan
+    lonjakan maksimal `burst` panggilan. acquire() menunggu sampai ada token.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return  # tanpa batas
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryableError(Exception):
+    """Error sementara (rate limit, timeout, koneksi) yang layak dicoba ulang."""
+
+
+def with_retry(fn, *args, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+               retry_on: tuple = (RetryableError,), **kwargs):
+    """
+    Panggil fn(*args, **kwargs); jika melempar salah satu `retry_on`, coba lagi
+    dengan exponential backoff + jitter (base_delay * 2^percobaan, maks max_delay).
+    Error terakhir dilempar ulang setelah max_retries percobaan ulang.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except retry_on as e:
+            if attempt == max_retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logging.warning(f"{e} - coba lagi dalam {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+def bounded_submit(pool, fn, items, window: int):
+    """
+    Generator (item, future) untuk fn(item) di pool, sesuai urutan items,
+    dengan paling banyak `window` future yang belum diambil. Item berikutnya
+    baru di-submit saat satu hasil diambil, sehingga saat generator ditutup
+    (Ctrl-C atau error; pakai contextlib.closing) hanya sedikit future yang
+    tersisa dan yang belum mulai dibatalkan, tanpa menghabiskan kuota API.
+    """
+    items = iter(items)
+    pending = deque((item, pool.submit(fn, item)) for item in itertools.islice(items, window))
+    try:
+        while pending:
+            item, future = pending.popleft()
+            for next_item in itertools.islice(items, 1):
+                pending.append((next_item, pool.submit(fn, next_item)))
+            yield item, future
+    finally:
+        for _, future in pending:
+            future.cancel()
@@ -0,0 +1,74 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils import batch_score
+import utils.model_qwen2
+import utils.model_sailor2
+
+
+def _items(n):
+    return [{"id": f"call_{i}", "file": f"call_{i}.wav", "label": "0", "transcription": f"halo {i}"}
+            for i in range(n)]
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _stub_models(monkeypatch):
+    monkeypatch.setattr(batch_score, "decode_audio", lambda path: np.zeros(16000, dtype=np.float32))
+    monkeypatch.setattr(utils.model_sailor2, "predict_fraud_sailor2_batch",
+                        lambda texts, **kwargs: [{"fraud": 0, "raw_pred": "1", "fraud_prob": 0.5} for _ in texts])
+    monkeypatch.setattr(utils.model_qwen2, "predict_fraud_qwen2_batch",
+                        lambda audios, **kwargs: [{"fraud": 1, "raw_pred": "2"} for _ in audios])
+
+
+def test_unexpected_stage_error_does_not_hang(monkeypatch, tmp_path):
+    _stub_models(monkeypatch)
+
+    def broken(pred, band):
+        raise RuntimeError("boom")
+
+    # Error di luar blok try per batch (routing cascade di stage Sailor2)
+    monkeypatch.setattr(batch_score.cascade, "needs_audio_model", broken)
+    output = tmp_path / "results.jsonl"
+    runner = threading.Thread(target=batch_score.score, args=(_items(20), str(output)),
+                              kwargs={"batch_size": 4, "use_manifest_transcripts": True,
+                                      "cascade_band": (0.2, 0.8)}, daemon=True)
+    runner.start()
+    runner.join(timeout=30)
+    assert not runner.is_alive()
+    records = _read(output)
+    assert len(records) == 20
+    assert all(record["error"] == "sailor2: boom" for record in records)
+
+
+def test_export_parquet_keeps_last_record_per_id(tmp_path):
+    output = tmp_path / "results.jsonl"
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "file": "a.wav", "error": "whisper: gagal"}) + "\n")
+        f.write(json.dumps({"id": "b", "file": "b.wav", "sailor2": {"fraud": 1}}) + "\n")
+        f.write(json.dumps({"id": "a", "file": "a.wav", "sailor2": {"fraud": 0}}) + "\n")
+    batch_score.export_parquet(str(output), str(tmp_path / "results.parquet"))
+    df = pd.read_parquet(tmp_path / "results.parquet").set_index("id")
+    assert sorted(df.index) == ["a", "b"]
+    assert df.loc["a", "sailor2.fraud"] == 0
+    assert "error" not in df.columns
+
+
+def test_duplicate_manifest_rows_scored_once(monkeypatch, tmp_path):
+    _stub_models(monkeypatch)
+    items = _items(5)
+    items.append(dict(items[2]))
+    output = tmp_path / "results.jsonl"
+    runner = threading.Thread(target=batch_score.score, args=(items, str(output)),
+                              kwargs={"batch_size": 4, "use_manifest_transcripts": True, "skip_qwen2": True},
+                              daemon=True)
+    runner.start()
+    runner.join(timeout=30)
+    assert not runner.is_alive()
+    assert sorted(record["id"] for record in _read(output)) == [f"call_{i}" for i in range(5)]
@@ -0,0 +1,37 @@
+from utils.lexicon import LexiconMatcher, normalize
+
+
+def tokens(text):
+    return [token for token, _, _ in normalize(text)]
+
+
+def test_number_run_breaks_at_punctuation():
+    assert tokens("dua puluh lima ribu, seribu dua ratus") == ["25000", "1200"]
+    assert tokens("lima ribu. Seribu lagi") == ["5000", "1000", "lagi"]
+    assert tokens("dua puluh lima ribu seribu") == ["26000"]
+    assert tokens("Rp150.000, kirim sekarang") == ["rp", "150000", "kirim", "sekarang"]
+
+
+def test_streaming_matches_full_scan_across_punctuation():
+    matcher = LexiconMatcher({"biaya": {"biaya admin 25000": 0.5, "1200": 0.2}})
+    text = "ada biaya admin dua puluh lima ribu, seribu dua ratus ya"
+    expected = matcher.scan(text)["matches"]
+    assert [m["pattern"] for m in expected] == ["biaya admin 25000", "1200"]
+    for size in (1, 3, 7, len(text)):
+        scanner = matcher.scanner()
+        for i in range(0, len(text), size):
+            scanner.feed(text[i:i + size])
+        scanner.finish()
+        assert scanner.matches == expected
+
+
+def test_scanner_keeps_bounded_text_tail():
+    matcher = LexiconMatcher()
+    scanner = matcher.scanner()
+    filler = "halo selamat siang iya bu saya mau konfirmasi pesanan paketnya sudah sampai "
+    for _ in range(500):
+        scanner.feed(filler)
+    found = scanner.feed("tolong sebutkan kode otp dua puluh lima ribu, ")
+    assert len(scanner._text) < 2 * len(filler)
+    assert [m["text"] for m in found] == ["kode otp", "otp"]
+    assert found[0]["start"] == 500 * len(filler) + len("tolong sebutkan ")
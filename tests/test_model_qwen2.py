@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from utils import model_qwen2
+from utils.model_qwen2 import _prepare_inputs, qwen2
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir(model_qwen2.MODEL_PATH),
+    reason="checkpoint Qwen2-Audio tidak tersedia (set QWEN2_MODEL_PATH)",
+)
+
+
+def _generate(m, audio, use_prefix_cache):
+    inputs = _prepare_inputs(m, [audio], use_prefix_cache=use_prefix_cache)
+    with torch.no_grad():
+        out = m.model.generate(
+            **inputs, max_new_tokens=4, do_sample=False, output_scores=True, return_dict_in_generate=True,
+            pad_token_id=m.processor.tokenizer.pad_token_id,
+        )
+    return inputs, out
+
+
+def test_prefix_cache_matches_full_prefill():
+    m = qwen2.get()
+    if m.prefix_cache is None:
+        pytest.skip("QWEN2_PREFIX_CACHE=0")
+    rng = np.random.default_rng(0)
+    audios = [rng.standard_normal(model_qwen2.SAMPLING_RATE * 3).astype(np.float32) * 0.1 for _ in range(2)]
+
+    first_scores = []
+    for audio in audios:
+        cached_inputs, cached = _generate(m, audio, use_prefix_cache=True)
+        assert "past_key_values" in cached_inputs
+        _, full = _generate(m, audio, use_prefix_cache=False)
+        assert torch.equal(cached.sequences, full.sequences)
+        for a, b in zip(cached.scores, full.scores):
+            assert torch.allclose(a, b, atol=1e-4)
+        first_scores.append(cached.scores[0])
+
+    # Audio berbeda harus memberi logit berbeda: fitur audio benar-benar
+    # di-merge di jalur cache, bukan hanya prompt teks
+    assert not torch.allclose(first_scores[0], first_scores[1])
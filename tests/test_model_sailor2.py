@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from utils import model_sailor2
+from utils.model_sailor2 import PROMPT_TEMPLATE, predict_fraud_sailor2, sailor2
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir(model_sailor2.MODEL_PATH),
+    reason="checkpoint Sailor2 tidak tersedia (set SAILOR2_MODEL_PATH)",
+)
+
+SAMPLES = [
+    "Halo, selamat siang. Saya mau tanya jadwal kereta ke Cirebon besok pagi. Ada jam tujuh, Pak.",
+    "Selamat siang Bapak, kami dari bank. Rekening Bapak diblokir, mohon sebutkan kode OTP yang baru dikirim.",
+]
+
+
+def test_prompt_ends_where_class_token_starts():
+    m = sailor2.get()
+    for transcript in SAMPLES:
+        prompt = PROMPT_TEMPLATE.format(transcript)
+        prompt_ids = m.tokenizer(prompt)["input_ids"]
+        for class_id, label in zip(m.class_token_ids, ("1", "2")):
+            # Format training "kelas {label}": token kelas tepat setelah prompt
+            assert m.tokenizer(prompt + label)["input_ids"] == prompt_ids + [class_id]
+
+
+def test_logits_and_generate_agree():
+    for transcript in SAMPLES:
+        logits = predict_fraud_sailor2(transcript, mode="logits")
+        generated = predict_fraud_sailor2(transcript, mode="generate")
+        assert generated["raw_pred"].strip()[:1] == logits["raw_pred"]
+        assert generated["fraud"] == logits["fraud"]
@@ -0,0 +1,29 @@
+import json
+
+import numpy as np
+import torch
+
+import utils.pipeline as pipeline
+from utils import telemetry
+
+
+def _matmul(*args, **kwargs):
+    torch.mm(torch.ones(8, 8), torch.ones(8, 8))
+
+
+def test_profile_trace_contains_model_ops(monkeypatch, tmp_path):
+    monkeypatch.setattr(telemetry, "TORCH_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "transcribe_audio", lambda audio: _matmul() or "halo")
+    monkeypatch.setattr(pipeline, "predict_fraud_sailor2", lambda text: _matmul() or {"fraud": 0, "fraud_prob": 0.1})
+    monkeypatch.setattr(pipeline, "predict_fraud_qwen2", lambda audio: _matmul() or {"fraud": 0})
+
+    seen = []
+    result = pipeline.run_analysis(np.zeros(16000, dtype=np.float32), on_result=lambda stage, _: seen.append(stage))
+    assert sorted(seen) == sorted(pipeline.STAGES)
+    assert result["transcript"] == "halo"
+
+    traces = list(tmp_path.glob("analysis-*.json"))
+    assert len(traces) == 1
+    with open(traces[0]) as f:
+        names = [event.get("name") for event in json.load(f)["traceEvents"]]
+    assert names.count("aten::mm") == 3
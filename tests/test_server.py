@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import utils.server as server
+from utils.micro_batcher import QueueFullError
+
+
+class FakeBatcher:
+    def __init__(self, name, batch_fn, *args):
+        self.name = name
+        self.cancelled = False
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self):
+        return {}
+
+    async def submit(self, item, timeout=None):
+        if self.name == "qwen2":
+            raise QueueFullError("antrian qwen2 penuh")
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def test_audio_branch_cancelled_when_other_branch_rejected(monkeypatch):
+    monkeypatch.setattr(server, "SERVER_ENABLE_QWEN2", True)
+    monkeypatch.setattr(server, "MODELS", [])
+    monkeypatch.setattr(server, "MicroBatcher", FakeBatcher)
+    monkeypatch.setattr(server, "decode_audio", lambda data: data)
+    with TestClient(server.app) as client:
+        response = client.post("/v1/score/audio", content=b"audio")
+        assert response.status_code == 503
+        assert client.app.state.batchers["whisper"].cancelled
@@ -0,0 +1,33 @@
+import numpy as np
+
+import utils.streaming as streaming
+from utils.audio_processing import SAMPLE_RATE
+
+
+def test_silence_keeps_buffer_bounded(monkeypatch):
+    transcribed_seconds = []
+
+    def fake_transcribe(buffer, language=None):
+        transcribed_seconds.append(len(buffer) / SAMPLE_RATE)
+        return []  # hening: Whisper tidak menghasilkan segmen
+
+    monkeypatch.setattr(streaming, "transcribe_segments", fake_transcribe)
+    detector = streaming.StreamingFraudDetector(window_seconds=30, step_seconds=5, use_lexicon=False)
+    for _ in range(40):
+        detector.feed(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    assert len(transcribed_seconds) == 8
+    assert max(transcribed_seconds) <= detector.window_seconds
+    assert len(detector._buffer) / SAMPLE_RATE <= detector.window_seconds
+
+
+def test_score_uses_windowed_mode(monkeypatch):
+    calls = []
+    monkeypatch.setattr(streaming, "transcribe_segments",
+                        lambda buffer, language=None: [{"text": "halo", "start": 0.0, "end": 1.0}])
+    monkeypatch.setattr(streaming, "predict_fraud_sailor2",
+                        lambda transcript, mode="logits": calls.append(mode) or {"fraud": 0, "fraud_prob": 0.1})
+    detector = streaming.StreamingFraudDetector(step_seconds=5, score_every_seconds=10, use_lexicon=False)
+    for _ in range(20):
+        detector.feed(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert calls and set(calls) == {"windowed"}
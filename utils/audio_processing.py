@@ -1,9 +1,43 @@
+import math
 import os
 import librosa
+import numpy as np
 import soundfile as sf
 import tempfile
 import subprocess
 
+# Semua model (Whisper, Qwen2-Audio) memakai audio mono 16 kHz
+SAMPLE_RATE = 16000
+
+def decode_audio(source, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode audio/video sekali menjadi array mono float32 pada sample rate sr.
+    Args:
+        source: path file, atau bytes isi file (mis. hasil upload)
+        sr: sample rate tujuan (default 16 kHz)
+    Returns:
+        waveform: np.ndarray float32 di rentang [-1, 1]
+    Bytes dikirim ke ffmpeg lewat stdin, jadi tidak ada file sementara yang ditulis.
+    """
+    is_path = isinstance(source, (str, os.PathLike))
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-threads", "0",
+        "-i", os.fspath(source) if is_path else "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+        "pipe:1",
+    ]
+    if not is_path:
+        command.remove("-nostdin")
+    proc = subprocess.run(
+        command,
+        input=None if is_path else bytes(source),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Gagal decode audio: {proc.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
 def extract_audio(file_path: str) -> str:
     ext = os.path.splitext(file_path)[1].lower()
     if ext == '.wav':
@@ -21,17 +55,96 @@ def extract_audio(file_path: str) -> str:
     else:
         raise ValueError("Unsupported file type")
 
-def preprocess_audio(input_path: str, output_path: str = None, target_sr: int = 16000) -> str:
+def resample(y: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Resample polyphase (scipy.signal.resample_poly) untuk rasio tetap,
+    mis. 24 kHz -> 16 kHz = naik 2, turun 3. Jauh lebih cepat daripada
+    resampler umum untuk rasio bilangan bulat kecil seperti ini.
+    """
+    if orig_sr == target_sr:
+        return y
+    from scipy.signal import resample_poly
+
+    g = math.gcd(orig_sr, target_sr)
+    return resample_poly(y, target_sr // g, orig_sr // g).astype(np.float32)
+
+def load_audio(path: str, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Baca file audio menjadi mono float32 pada target_sr. Format yang didukung
+    libsndfile (wav/flac/ogg) dibaca langsung lalu di-resample polyphase;
+    format lain (mp3/mp4/...) lewat librosa.
+    """
+    try:
+        y, sr = sf.read(path, dtype="float32", always_2d=True)
+    except RuntimeError:
+        y, _ = librosa.load(path, sr=target_sr, mono=True)
+        return y
+    return resample(y.mean(axis=1), sr, target_sr)
+
+def preprocess_audio(input_path, output_path: str = None, target_sr: int = SAMPLE_RATE) -> str:
     """
     Preprocess audio: resample to target_sr (default 16kHz), convert to mono, and save.
+    input_path can also be a waveform already decoded at target_sr (see decode_audio),
+    in which case it is written as-is without decoding again.
     Returns the path to the preprocessed file.
-    If output_path is None, will save to a temp file.
+    If output_path is None, will save to a temp file; otherwise the file is
+    written to a temporary name first and renamed, so it is never half-written.
     """
-    y, sr = librosa.load(input_path, sr=target_sr, mono=True)
+    if isinstance(input_path, np.ndarray):
+        y = input_path
+    else:
+        y = load_audio(input_path, target_sr)
     if output_path is None:
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
             sf.write(tmp.name, y, target_sr)
             return tmp.name
     else:
-        sf.write(output_path, y, target_sr)
-        return output_path
\ No newline at end of file
+        tmp_path = f"{output_path}.tmp"
+        sf.write(tmp_path, y, target_sr, format=os.path.splitext(output_path)[1][1:] or "WAV")
+        os.replace(tmp_path, output_path)
+        return output_path
+
+def speech_intervals(y: np.ndarray, sr: int = SAMPLE_RATE, frame_ms: int = 30, threshold_db: float = -35.0,
+                     min_silence_ms: int = 500, pad_ms: int = 200) -> list:
+    """
+    VAD berbasis energi: cari bagian audio yang berisi suara.
+    Frame dianggap suara jika energinya di atas (energi frame terkeras + threshold_db).
+    Jeda lebih pendek dari min_silence_ms tidak dipotong, dan setiap bagian
+    diberi padding pad_ms agar awal/akhir kata tidak terpotong.
+    Returns:
+        list of (start, end) dalam indeks sampel
+    """
+    frame = int(sr * frame_ms / 1000)
+    n_frames = len(y) // frame
+    if n_frames == 0:
+        return [(0, len(y))] if len(y) else []
+
+    frames = y[:n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float32) ** 2, axis=1) + 1e-10)
+    voiced = energy_db > energy_db.max() + threshold_db
+
+    # Batas awal/akhir setiap run frame bersuara
+    edges = np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_gap = int(np.ceil(min_silence_ms / frame_ms))
+    pad = int(sr * pad_ms / 1000)
+    intervals = []
+    for start, end in zip(starts, ends):
+        if intervals and start - intervals[-1][1] < min_gap:
+            intervals[-1][1] = end
+        else:
+            intervals.append([start, end])
+    return [
+        (max(0, int(start) * frame - pad), min(len(y), int(end) * frame + pad))
+        for start, end in intervals
+    ]
+
+
+def remove_silence(y: np.ndarray, sr: int = SAMPLE_RATE, **vad_kwargs) -> np.ndarray:
+    """Buang bagian hening (lihat speech_intervals) dan gabungkan sisanya."""
+    intervals = speech_intervals(y, sr, **vad_kwargs)
+    if not intervals:
+        return y[:0]
+    return np.concatenate([y[start:end] for start, end in intervals])
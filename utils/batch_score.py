@@ -0,0 +1,434 @@
+"""
+Skoring massal panggilan secara offline (tanpa UI).
+
+Input berupa folder berisi file audio, atau CSV manifest dengan kolom
+`file,label,transcription` seperti yang ditulis dataset_creation/create_dataset.py.
+Decode audio, Whisper, Sailor2 dan Qwen2-Audio berjalan sebagai stage terpisah
+yang saling terhubung lewat queue, sehingga model bekerja bersamaan.
+Hasil ditulis per panggilan ke JSONL; file ini sekaligus menjadi checkpoint,
+jadi run yang terhenti bisa dilanjutkan dengan perintah yang sama.
+
+Contoh:
+    python -m utils.batch_score dataset_creation/dataset.csv --output results.jsonl
+    python -m utils.batch_score recordings/ --output results.jsonl --parquet results.parquet
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils import cascade
+from utils.audio_processing import decode_audio
+from utils.model_cache import ModelCache, text_hash
+from utils.result_cache import content_hash
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".mp4", ".ogg", ".m4a", ".aac")
+_DONE = object()
+
+
+def load_items(source: str) -> list:
+    """Daftar panggilan dari folder audio atau CSV manifest."""
+    if os.path.isdir(source):
+        return [
+            {"id": entry.path, "file": entry.path}
+            for entry in sorted(os.scandir(source), key=lambda e: e.name)
+            if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+        ]
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    items = []
+    with open(source, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            path = row["file"]
+            # Path di manifest create_dataset.py relatif terhadap folder CSV-nya
+            if not os.path.isabs(path) and not os.path.exists(path):
+                path = os.path.join(base_dir, path)
+            items.append({
+                "id": row["file"],
+                "file": path,
+                "label": row.get("label"),
+                "transcription": row.get("transcription"),
+            })
+    return items
+
+
+def read_checkpoint(output: str) -> set:
+    """Id yang sudah berhasil diskor pada run sebelumnya (baris dengan error diulang)."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # baris terakhir bisa terpotong jika proses mati saat menulis
+            if "error" not in record:
+                done.add(record["id"])
+    return done
+
+
+class StageStats:
+    """Jumlah item dan waktu sibuk per stage, untuk menghitung panggilan/detik."""
+
+    def __init__(self, names):
+        self.count = {name: 0 for name in names}
+        self.busy = {name: 0.0 for name in names}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, name: str, n: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.busy[name] += time.perf_counter() - start
+                self.count[name] += n
+
+    def report(self, wall: float) -> str:
+        parts = []
+        for name in self.count:
+            rate = self.count[name] / self.busy[name] if self.busy[name] else 0.0
+            parts.append(f"{name}: {self.count[name]} ({rate:.2f}/s)")
+        return " | ".join(parts) + f" | wall {wall:.1f}s"
+
+
+def score(items: list, output: str, batch_size: int = 8, decode_workers: int = 4,
+          use_manifest_transcripts: bool = False, skip_qwen2: bool = False,
+          report_every: float = 30.0, windowed: bool = False, cache: ModelCache = None,
+          cascade_band: tuple = None, use_prefilter: bool = False) -> StageStats:
+    """
+    Skor semua item yang belum ada di checkpoint dan tambahkan hasilnya ke output.
+    Jika cache diisi, output model yang sudah tersimpan (transkrip, verdict)
+    dipakai ulang dan hanya model yang belum punya hasil yang dijalankan.
+    Jika cascade_band (low, high) diisi, Qwen2-Audio hanya menerima panggilan
+    yang probabilitas penipuan Sailor2-nya di dalam band; yang lain ditulis
+    dengan qwen2 = null, dan setiap baris mendapat verdict akhir 'cascade'.
+    Jika use_prefilter, utils.prefilter menyaring transkrip yang jelas bukan
+    penipuan sebelum Sailor2.
+    """
+    from utils.model_whisper import WHISPER_MODEL_ID, transcribe_audio
+    from utils.model_sailor2 import MODEL_ID as SAILOR2_MODEL_ID, SAILOR2_AGGREGATE, predict_fraud_sailor2_batch
+    from utils.model_qwen2 import MODEL_ID as QWEN2_MODEL_ID, predict_fraud_qwen2_batch
+
+    if cascade_band is not None and skip_qwen2:
+        raise ValueError("cascade_band membutuhkan Qwen2-Audio (skip_qwen2=False)")
+    sailor2_id = SAILOR2_MODEL_ID + (f":windowed-{SAILOR2_AGGREGATE}" if windowed else "")
+    if use_prefilter:
+        from utils import prefilter
+
+        sailor2_id += f"+{prefilter.model_id()}"
+
+    def predict_sailor2(transcripts):
+        def run(texts):
+            return predict_fraud_sailor2_batch(texts, batch_size=batch_size, windowed=windowed)
+        return prefilter.predict_gated(transcripts, run) if use_prefilter else run(transcripts)
+
+    done = read_checkpoint(output)
+    # Loop hasil menunggu satu record per id; baris manifest dengan id ganda cukup diskor sekali
+    todo = list({item["id"]: item for item in items if item["id"] not in done}.values())
+    if len(todo) < sum(item["id"] not in done for item in items):
+        logging.warning("Manifest berisi id ganda; setiap id hanya diskor sekali")
+    logging.info(f"{len(done)} panggilan sudah diskor, {len(todo)} tersisa")
+    stages = ["decode", "whisper", "sailor2"] + ([] if skip_qwen2 else ["qwen2"])
+    stats = StageStats(stages)
+    if not todo:
+        return stats
+
+    # Queue dibatasi agar stage yang cepat tidak menumpuk waveform di memori
+    whisper_q = queue.Queue(maxsize=batch_size * 4)
+    qwen2_q = queue.Queue(maxsize=batch_size * 4)
+    sailor2_q = queue.Queue(maxsize=batch_size * 4)
+    result_q = queue.Queue()
+
+    def fail(items_, stage, e):
+        logging.error(f"Stage {stage} gagal: {e}")
+        for item in items_:
+            item.pop("waveform", None)
+            result_q.put((item, stage, {"error": f"{stage}: {e}"}))
+
+    ended = set()  # queue yang _DONE-nya sudah diambil oleh batches()
+
+    def drain(q, stage, e):
+        """
+        Stage berhenti karena error tak terduga: gagalkan semua item yang masih
+        akan datang di q, supaya stage sebelumnya tidak terblokir di put() dan
+        loop utama tidak menunggu hasil yang tidak akan pernah datang.
+        """
+        if q in ended:
+            return
+        while (entry := q.get()) is not _DONE:
+            fail([entry[0]], stage, e)
+
+    def decode_stage():
+        needs_audio = not (use_manifest_transcripts and skip_qwen2)
+        forwarded = set()  # id yang sudah diteruskan ke stage berikutnya atau digagalkan
+        window = []
+
+        def timed_decode(item):
+            with stats.timed("decode"):
+                if cache is None:
+                    return decode_audio(item["file"])
+                with open(item["file"], "rb") as f:
+                    data = f.read()
+                item["audio_hash"] = content_hash(data)
+                item["cached"] = {}
+                if not use_manifest_transcripts:
+                    item["cached"]["transcript"] = cache.get("transcript", item["audio_hash"], WHISPER_MODEL_ID)
+                if not skip_qwen2:
+                    item["cached"]["qwen2"] = cache.get("qwen2", item["audio_hash"], QWEN2_MODEL_ID)
+                if all(value is not None for value in item["cached"].values()):
+                    return None  # semua output yang butuh audio sudah ada di cache
+                return decode_audio(data)
+
+        def drain_one():
+            item, future = window.pop(0)
+            try:
+                waveform = future.result()
+            except Exception as e:
+                fail([item], "decode", e)
+                forwarded.add(item["id"])
+                return
+            whisper_q.put((item, waveform))
+            if cascade_band is not None:
+                # Disimpan sampai Sailor2 memutuskan apakah Qwen2-Audio perlu dijalankan
+                item["waveform"] = waveform
+            elif not skip_qwen2:
+                qwen2_q.put((item, waveform))
+            forwarded.add(item["id"])
+
+        try:
+            with ThreadPoolExecutor(max_workers=decode_workers) as pool:
+                for item in todo:
+                    future = pool.submit(timed_decode, item) if needs_audio else pool.submit(lambda: None)
+                    window.append((item, future))
+                    if len(window) >= decode_workers * 2:
+                        drain_one()
+                while window:
+                    drain_one()
+        except Exception as e:
+            fail([item for item in todo if item["id"] not in forwarded], "decode", e)
+        finally:
+            whisper_q.put(_DONE)
+            if cascade_band is None:
+                qwen2_q.put(_DONE)
+
+    def whisper_stage():
+        entry = None
+        try:
+            while (entry := whisper_q.get()) is not _DONE:
+                item, waveform = entry
+                try:
+                    with stats.timed("whisper"):
+                        if use_manifest_transcripts:
+                            transcript = item["transcription"] or ""
+                        elif item.get("cached", {}).get("transcript") is not None:
+                            transcript = item["cached"]["transcript"]
+                        else:
+                            transcript = transcribe_audio(waveform)
+                            if cache is not None:
+                                cache.put("transcript", item["audio_hash"], WHISPER_MODEL_ID, transcript)
+                except Exception as e:
+                    fail([item], "whisper", e)
+                    continue
+                sailor2_q.put((item, transcript))
+        except Exception as e:
+            if entry is not None:
+                fail([entry[0]], "whisper", e)
+            drain(whisper_q, "whisper", e)
+        finally:
+            sailor2_q.put(_DONE)
+
+    def batches(q):
+        batch = []
+        while (entry := q.get()) is not _DONE:
+            batch.append(entry)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        ended.add(q)
+        if batch:
+            yield batch
+
+    def sailor2_stage():
+        batch = []
+        try:
+            for batch in batches(sailor2_q):
+                batch_items = [item for item, _ in batch]
+                preds = [cache.get("sailor2", text_hash(t), sailor2_id) if cache else None for _, t in batch]
+                todo_rows = [row for row, pred in enumerate(preds) if pred is None]
+                try:
+                    if todo_rows:
+                        with stats.timed("sailor2", len(todo_rows)):
+                            computed = predict_sailor2([batch[row][1] for row in todo_rows])
+                        for row, pred in zip(todo_rows, computed):
+                            preds[row] = pred
+                            if cache is not None:
+                                cache.put("sailor2", text_hash(batch[row][1]), sailor2_id, pred)
+                except Exception as e:
+                    fail(batch_items, "sailor2", e)
+                    continue
+                for (item, transcript), pred in zip(batch, preds):
+                    result_q.put((item, "transcript", transcript))
+                    result_q.put((item, "sailor2", pred))
+                    if cascade_band is None:
+                        continue
+                    waveform = item.pop("waveform", None)
+                    if cascade.needs_audio_model(pred, cascade_band):
+                        qwen2_q.put((item, waveform))
+                    else:
+                        result_q.put((item, "qwen2", None))
+        except Exception as e:
+            # Sebagian item batch ini mungkin sudah lengkap; loop utama mengabaikan id yang sudah ditulis
+            fail([item for item, _ in batch], "sailor2", e)
+            drain(sailor2_q, "sailor2", e)
+        finally:
+            if cascade_band is not None:
+                qwen2_q.put(_DONE)
+
+    def qwen2_stage():
+        batch = []
+        try:
+            for batch in batches(qwen2_q):
+                batch_items = [item for item, _ in batch]
+                preds = [item.get("cached", {}).get("qwen2") for item in batch_items]
+                todo_rows = [row for row, pred in enumerate(preds) if pred is None]
+                try:
+                    if todo_rows:
+                        with stats.timed("qwen2", len(todo_rows)):
+                            computed = predict_fraud_qwen2_batch([batch[row][1] for row in todo_rows], batch_size=batch_size)
+                        for row, pred in zip(todo_rows, computed):
+                            preds[row] = pred
+                            if cache is not None:
+                                cache.put("qwen2", batch_items[row]["audio_hash"], QWEN2_MODEL_ID, pred)
+                except Exception as e:
+                    fail(batch_items, "qwen2", e)
+                    continue
+                for item, pred in zip(batch_items, preds):
+                    result_q.put((item, "qwen2", pred))
+        except Exception as e:
+            fail([item for item, _ in batch], "qwen2", e)
+            drain(qwen2_q, "qwen2", e)
+
+    threads = [threading.Thread(target=decode_stage), threading.Thread(target=whisper_stage),
+               threading.Thread(target=sailor2_stage)]
+    if not skip_qwen2:
+        threads.append(threading.Thread(target=qwen2_stage))
+    for t in threads:
+        t.daemon = True
+        t.start()
+
+    expected = {"transcript", "sailor2"} | (set() if skip_qwen2 else {"qwen2"})
+    pending = {}
+    finished = set()
+    escalated = 0
+    start = last_report = time.perf_counter()
+    if os.path.exists(output) and os.path.getsize(output) > 0:
+        # Pastikan baris baru tidak menyambung ke baris terakhir yang terpotong
+        with open(output, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    with open(output, "a", encoding="utf-8") as out:
+        while len(finished) < len(todo):
+            item, key, value = result_q.get()
+            if item["id"] in finished:
+                continue
+            record = pending.setdefault(item["id"], {
+                "id": item["id"], "file": item["file"], "label": item.get("label"),
+            })
+            if isinstance(value, dict) and "error" in value:
+                record["error"] = value["error"]
+            else:
+                record[key] = value
+            if "error" in record or expected <= record.keys():
+                if cascade_band is not None and "error" not in record:
+                    record["cascade"] = cascade.decide(record["sailor2"], record["qwen2"], cascade_band)
+                    escalated += record["cascade"]["escalated"]
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                finished.add(item["id"])
+                del pending[item["id"]]
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                logging.info(f"[{len(finished)}/{len(todo)}] {stats.report(now - start)}")
+
+    for t in threads:
+        t.join()
+    logging.info(f"Selesai. {stats.report(time.perf_counter() - start)}")
+    if cascade_band is not None:
+        logging.info(f"Cascade {list(cascade_band)}: {escalated}/{len(todo)} panggilan dieskalasi ke Qwen2-Audio")
+    return stats
+
+
+def export_parquet(jsonl_path: str, parquet_path: str):
+    """
+    Konversi hasil JSONL ke Parquet (kolom nested diratakan, mis. sailor2.fraud),
+    satu baris per id.
+    """
+    import pandas as pd
+
+    with open(jsonl_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    # Setelah resume, baris error lama tetap ada di JSONL: ambil record terakhir per id
+    records = list({record["id"]: record for record in records}.values())
+    pd.json_normalize(records).to_parquet(parquet_path, index=False)
+    logging.info(f"{len(records)} baris ditulis ke {parquet_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Folder audio atau CSV manifest (file,label,transcription)")
+    parser.add_argument("--output", default="results.jsonl", help="File JSONL hasil (juga checkpoint)")
+    parser.add_argument("--parquet", help="Tulis juga hasil akhir ke file Parquet ini")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--use-manifest-transcripts", action="store_true",
+                        help="Pakai kolom transcription dari manifest, lewati Whisper")
+    parser.add_argument("--skip-qwen2", action="store_true", help="Hanya jalankan jalur teks (Whisper + Sailor2)")
+    parser.add_argument("--windowed", action="store_true",
+                        help="Nilai transkrip panjang per window yang overlap alih-alih memotongnya")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="File SQLite untuk memakai ulang transkrip/verdict yang sudah pernah dihitung")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Jalankan Qwen2-Audio hanya jika Sailor2 ragu (lihat --cascade-band)")
+    parser.add_argument("--cascade-band", type=float, nargs=2, metavar=("LOW", "HIGH"), default=cascade.DEFAULT_BAND,
+                        help="Rentang probabilitas penipuan Sailor2 yang dieskalasi (default CASCADE_LOW/CASCADE_HIGH)")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="Saring transkrip yang jelas bukan penipuan dengan utils.prefilter sebelum Sailor2")
+    parser.add_argument("--report-every", type=float, default=30.0, help="Interval laporan kecepatan (detik)")
+    args = parser.parse_args()
+
+    if args.cascade and args.skip_qwen2:
+        parser.error("--cascade tidak bisa dipakai bersama --skip-qwen2")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    items = load_items(args.source)
+    score(
+        items,
+        args.output,
+        batch_size=args.batch_size,
+        decode_workers=args.decode_workers,
+        use_manifest_transcripts=args.use_manifest_transcripts,
+        skip_qwen2=args.skip_qwen2,
+        report_every=args.report_every,
+        windowed=args.windowed,
+        cache=ModelCache(args.cache) if args.cache else None,
+        cascade_band=tuple(args.cascade_band) if args.cascade else None,
+        use_prefilter=args.prefilter,
+    )
+    if args.parquet:
+        export_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# utils/cascade.py
+
+import os
+
+# Mode cascade: jalur teks (Whisper + Sailor2) dijalankan dulu, Qwen2-Audio
+# hanya jika probabilitas penipuan dari Sailor2 ada di dalam band [low, high]
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+CASCADE_LOW = float(os.getenv("CASCADE_LOW", "0.2"))
+CASCADE_HIGH = float(os.getenv("CASCADE_HIGH", "0.8"))
+DEFAULT_BAND = (CASCADE_LOW, CASCADE_HIGH)
+
+
+def needs_audio_model(sailor2_result: dict, band: tuple = DEFAULT_BAND) -> bool:
+    """
+    True jika verdict Sailor2 tidak cukup yakin sehingga Qwen2-Audio perlu
+    dijalankan. Hasil tanpa 'fraud_prob' (mode "generate") selalu dieskalasi.
+    """
+    prob = sailor2_result.get("fraud_prob")
+    if prob is None:
+        return True
+    low, high = band
+    return low <= prob <= high
+
+
+def decide(sailor2_result: dict, qwen2_result: dict = None, band: tuple = DEFAULT_BAND) -> dict:
+    """
+    Verdict akhir cascade: Sailor2 jika yakin (di luar band), selain itu Qwen2-Audio.
+    Args:
+        sailor2_result: hasil predict_fraud_sailor2
+        qwen2_result: hasil predict_fraud_qwen2, atau None jika tidak dijalankan
+        band: (low, high) probabilitas penipuan yang dianggap ragu
+    Returns:
+        dict: {'fraud': 0/1, 'source': 'sailor2'|'qwen2', 'escalated': bool, 'band': [low, high]}
+    """
+    escalated = needs_audio_model(sailor2_result, band)
+    if escalated and qwen2_result is not None:
+        fraud, source = qwen2_result["fraud"], "qwen2"
+    else:
+        # Eskalasi tanpa hasil Qwen2-Audio (mis. dimatikan): tetap pakai Sailor2
+        fraud, source = sailor2_result["fraud"], "sailor2"
+    return {"fraud": fraud, "source": source, "escalated": escalated, "band": list(band)}
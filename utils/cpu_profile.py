@@ -0,0 +1,52 @@
+# utils/cpu_profile.py
+
+import io
+import logging
+import os
+
+import torch
+
+# Jumlah thread intra-op / inter-op PyTorch (0 = biarkan default PyTorch)
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "0"))
+# Bungkus model dengan torch.compile (butuh waktu kompilasi di panggilan pertama)
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"
+
+
+def configure_threads(threads: int = TORCH_THREADS, interop_threads: int = TORCH_INTEROP_THREADS):
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Hanya bisa diatur sebelum ada operasi paralel inter-op pertama
+            logging.warning("torch.set_num_interop_threads diabaikan: thread pool sudah berjalan")
+    logging.info(f"Torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def quantize_int8(model: torch.nn.Module, skip: tuple = ("lm_head",)) -> torch.nn.Module:
+    """
+    Dynamic quantization int8 untuk semua nn.Linear (bobot int8, aktivasi
+    dikuantisasi saat runtime). Modul di `skip` tetap float32; lm_head
+    dibiarkan agar logit token kelas tidak kehilangan presisi.
+    """
+    qconfig = {
+        name: torch.ao.quantization.default_dynamic_qconfig
+        for name, module in model.named_modules()
+        if isinstance(module, torch.nn.Linear) and name.split(".")[-1] not in skip
+    }
+    return torch.ao.quantization.quantize_dynamic(model, qconfig, dtype=torch.qint8)
+
+
+def maybe_compile(model: torch.nn.Module, enabled: bool = TORCH_COMPILE) -> torch.nn.Module:
+    if not enabled:
+        return model
+    return torch.compile(model, dynamic=True)
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    """Ukuran state_dict yang diserialisasi; ikut menghitung bobot int8 yang di-pack."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2**20
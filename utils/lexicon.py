@@ -0,0 +1,368 @@
+# utils/lexicon.py
+
+import json
+import os
+import re
+from collections import deque
+
+from utils import telemetry
+from utils.model_registry import register
+
+# File JSON opsional {"kategori": {"pola": bobot, ...}, ...} pengganti DEFAULT_LEXICON
+LEXICON_PATH = os.getenv("LEXICON_PATH")
+
+# Pola modus penipuan dari fraud_scenarios di dataset_creation/generateScript.py.
+# Bobot 0..1: seberapa kuat pola itu sendiri menandakan penipuan. Pola ditulis
+# dalam bentuk bebas; normalisasi yang sama dengan transkrip diterapkan saat build.
+DEFAULT_LEXICON = {
+    "otp": {
+        "kode otp": 0.7, "otp": 0.5, "kode verifikasi": 0.5, "enam belas digit": 0.5,
+        "nomor kartu": 0.3, "cvv": 0.6, "pin atm": 0.5, "sim swap": 0.6,
+    },
+    "apk": {
+        "apk": 0.6, "file apk": 0.7, "instal aplikasi": 0.3, "undangan digital": 0.3,
+        "foto resi": 0.3, "e tilang": 0.3,
+    },
+    "salah_transfer": {
+        "salah transfer": 0.6, "salah kirim": 0.4, "transfer balik": 0.4, "kembalikan uang": 0.3,
+        "rekening pribadi": 0.5,
+    },
+    "perbankan": {
+        "bi checking": 0.6, "blokir rekening": 0.4, "rekening diblokir": 0.4, "kartu diblokir": 0.4,
+        "skimming": 0.5, "nasabah prioritas": 0.3, "perubahan tarif": 0.4, "divisi anti fraud": 0.4,
+    },
+    "biaya": {
+        "biaya admin": 0.5, "pajak pemenang": 0.6, "biaya akomodasi": 0.4, "deposit": 0.3,
+        "uang tebusan": 0.6, "uang damai": 0.5, "paket membership": 0.4,
+    },
+    "hadiah": {
+        "menang undian": 0.5, "memenangkan undian": 0.5, "giveaway": 0.3, "klaim hadiah": 0.4,
+    },
+    "ancaman": {
+        "sebar data": 0.5, "menyebar data": 0.5, "debt collector": 0.3, "pinjol": 0.3,
+        "ditangkap polisi": 0.4,
+    },
+    "tautan": {
+        "klik link": 0.5, "isi link": 0.5, "kirim link": 0.3,
+    },
+}
+
+# Token: angka (boleh dengan pemisah ribuan, 150.000) atau deretan huruf;
+# huruf dan angka yang menempel dipisah ("Rp150.000" -> "rp", "150000")
+TOKEN_RE = re.compile(r"\d+(?:[.,]\d{3})+|\d+|[^\W\d]+")
+_LAST_SPACE_RE = re.compile(r"\s(?=\S*$)")
+# Tanda baca antar-token yang memutus rangkaian bilangan ("dua puluh lima ribu, seribu")
+_CLAUSE_BREAK_RE = re.compile(r"[,.;:!?]")
+
+# Variasi ejaan/singkatan umum -> bentuk baku (satu token ke satu token)
+SYNONYMS = {
+    "tf": "transfer", "trf": "transfer", "transper": "transfer",
+    "adm": "admin", "administrasi": "admin",
+    "cheking": "checking", "ceking": "checking", "cecking": "checking",
+    "rek": "rekening", "wa": "whatsapp",
+    "ga": "tidak", "gak": "tidak", "nggak": "tidak", "enggak": "tidak", "tdk": "tidak",
+    "install": "instal", "menginstal": "instal", "download": "unduh",
+}
+
+# Bilangan dalam kata -> digit, mis. "enam belas" -> "16", "seratus lima puluh ribu" -> "150000"
+DIGIT_WORDS = {
+    "nol": 0, "satu": 1, "dua": 2, "tiga": 3, "empat": 4, "lima": 5,
+    "enam": 6, "tujuh": 7, "delapan": 8, "sembilan": 9,
+}
+SE_WORDS = {"sepuluh": 10, "sebelas": 11, "seratus": 100}
+GROUP_MULTIPLIERS = {"puluh": 10, "ratus": 100}
+BIG_MULTIPLIERS = {"ribu": 10**3, "juta": 10**6, "miliar": 10**9}
+SE_BIG_WORDS = {"seribu": 10**3, "sejuta": 10**6}
+NUMBER_WORDS = {*DIGIT_WORDS, *SE_WORDS, *SE_BIG_WORDS}
+
+
+class _Normalizer:
+    """
+    Normalisasi token secara streaming: huruf kecil, sinonim, angka tanpa
+    pemisah ribuan, dan rangkaian kata bilangan digabung menjadi satu token
+    digit. Token keluar sebagai (teks, start, end) dengan offset karakter
+    di teks asli; rangkaian bilangan ditahan sampai token bukan-bilangan
+    atau tanda baca klausa/kalimat datang.
+    """
+
+    def __init__(self):
+        self._reset_number()
+
+    def _reset_number(self):
+        self.total = self.group = self.unit = 0
+        self.last_kind = None
+        self.raw = None  # teks angka asli jika rangkaian hanya satu token digit (jaga nol di depan)
+        self.span = None
+
+    def _flush_number(self) -> list:
+        if self.span is None:
+            return []
+        text = self.raw if self.raw is not None else str(self.total + self.group + self.unit)
+        token = (text, self.span[0], self.span[1])
+        self._reset_number()
+        return [token]
+
+    def _extend_span(self, start, end):
+        self.span = (self.span[0], end) if self.span else (start, end)
+
+    def push(self, word: str, start: int, end: int, source: str, base: int = 0) -> list:
+        """
+        Args:
+            word: teks token
+            start, end: offset token di teks asli
+            source: teks asli (untuk memeriksa tanda baca sebelum token)
+            base: offset karakter pertama source di teks asli
+        """
+        word = word.lower()
+        out = []
+        if self.span is not None and _CLAUSE_BREAK_RE.search(source, self.span[1] - base, start - base):
+            out = self._flush_number()
+        if self.span is None and word not in NUMBER_WORDS and not word[0].isdigit():
+            # Jalur cepat: kata biasa tanpa rangkaian bilangan yang tertahan
+            out.append((SYNONYMS.get(word, word), start, end))
+            return out
+        digits = word.replace(".", "").replace(",", "")
+        if digits.isdigit() or word in DIGIT_WORDS:
+            # Digit setelah digit (mis. "satu dua tiga") adalah bilangan baru
+            if self.last_kind == "digit":
+                out += self._flush_number()
+            self.raw = digits if digits.isdigit() and self.span is None else None
+            self.unit = int(digits) if digits.isdigit() else DIGIT_WORDS[word]
+            self.last_kind = "digit"
+        elif word == "belas" and self.last_kind == "digit":
+            self.group += self.unit + 10
+            self.unit, self.raw, self.last_kind = 0, None, "group"
+        elif word in GROUP_MULTIPLIERS and self.last_kind == "digit":
+            self.group += self.unit * GROUP_MULTIPLIERS[word]
+            self.unit, self.raw, self.last_kind = 0, None, "group"
+        elif word in SE_WORDS:
+            if self.last_kind == "digit":
+                out += self._flush_number()
+            self.group += SE_WORDS[word]
+            self.last_kind = "group"
+        elif word in BIG_MULTIPLIERS and self.span is not None:
+            self.total += ((self.group + self.unit) or 1) * BIG_MULTIPLIERS[word]
+            self.group = self.unit = 0
+            self.raw, self.last_kind = None, "big"
+        elif word in SE_BIG_WORDS:
+            if self.last_kind == "digit":
+                out += self._flush_number()
+            self.total += SE_BIG_WORDS[word]
+            self.last_kind = "big"
+        else:
+            out += self._flush_number()
+            out.append((SYNONYMS.get(word, word), start, end))
+            return out
+        self._extend_span(start, end)
+        return out
+
+    def flush(self) -> list:
+        return self._flush_number()
+
+
+def normalize(text: str) -> list:
+    """List token ternormalisasi (teks, start, end) dari satu teks utuh."""
+    normalizer = _Normalizer()
+    tokens = []
+    for m in TOKEN_RE.finditer(text):
+        tokens.extend(normalizer.push(m.group(), m.start(), m.end(), text))
+    tokens.extend(normalizer.flush())
+    return tokens
+
+
+def load_lexicon(path: str = LEXICON_PATH) -> dict:
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def risk_score(matches: list) -> float:
+    """
+    Gabungan bobot: 1 - Π(1 - bobot maksimum per kategori). Pola berulang
+    dari kategori yang sama tidak menaikkan skor; kategori berbeda saling menguatkan.
+    """
+    best = {}
+    for match in matches:
+        best[match["category"]] = max(best.get(match["category"], 0.0), match["weight"])
+    remaining = 1.0
+    for weight in best.values():
+        remaining *= 1.0 - weight
+    return round(1.0 - remaining, 4)
+
+
+class LexiconMatcher:
+    """
+    Automaton Aho-Corasick atas token ternormalisasi, dibangun sekali dari
+    lexicon {kategori: {pola: bobot}}. Pencocokan per kata (tidak pernah cocok
+    di tengah kata) dan linear terhadap jumlah token transkrip.
+    """
+
+    def __init__(self, lexicon: dict = None):
+        lexicon = lexicon if lexicon is not None else DEFAULT_LEXICON
+        self.patterns = []  # (pola, kategori, bobot, jumlah token)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for category, entries in lexicon.items():
+            for pattern, weight in entries.items():
+                tokens = [token for token, _, _ in normalize(pattern)]
+                if not tokens:
+                    continue
+                state = 0
+                for token in tokens:
+                    if token not in self._goto[state]:
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                        self._goto[state][token] = len(self._goto) - 1
+                    state = self._goto[state][token]
+                self._out[state].append(len(self.patterns))
+                self.patterns.append((pattern, category, float(weight), len(tokens)))
+        self.max_len = max((p[3] for p in self.patterns), default=0)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                # Output state fail ikut dilaporkan (pola yang merupakan sufiks)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def step(self, state: int, token: str) -> int:
+        while state and token not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(token, 0)
+
+    def scanner(self) -> "LexiconScanner":
+        return LexiconScanner(self)
+
+    def scan(self, text: str) -> dict:
+        """
+        Returns:
+            dict: {'risk': 0..1, 'matches': list {'pattern', 'category', 'weight',
+                   'start', 'end', 'text'}, 'categories': list kategori yang cocok}
+        """
+        with telemetry.span("lexicon.scan"):
+            scanner = self.scanner()
+            scanner.feed(text)
+            scanner.finish()
+            return scanner.result()
+
+    def scan_batch(self, texts: list) -> list:
+        return [self.scan(text) for text in texts]
+
+
+class LexiconScanner:
+    """
+    Pemindai inkremental untuk transkrip yang terus bertambah (mis. segmen
+    dari utils.streaming). feed() menerima potongan teks berikutnya dan
+    mengembalikan match baru; kata terakhir yang mungkin masih terpotong
+    ditahan sampai potongan berikutnya atau finish(). Offset match relatif
+    terhadap seluruh teks yang sudah di-feed.
+    """
+
+    def __init__(self, matcher: LexiconMatcher):
+        self.matcher = matcher
+        self.matches = []
+        self._normalizer = _Normalizer()
+        self._state = 0
+        self._starts = deque(maxlen=max(matcher.max_len, 1))  # start token-token terakhir
+        # Ekor teks asli yang masih bisa menjadi bagian match (untuk kolom 'text'
+        # dan pemeriksaan tanda baca); _text_start adalah offset karakter pertamanya
+        self._text = ""
+        self._text_start = 0
+        self._pos = 0  # offset karakter awal _carry
+        self._carry = ""
+
+    def _consume(self, tokens: list) -> list:
+        goto, fail, out = self.matcher._goto, self.matcher._fail, self.matcher._out
+        starts, state = self._starts, self._state
+        found = []
+        for token, start, end in tokens:
+            starts.append(start)
+            # Sama dengan LexiconMatcher.step, di-inline karena ini hot loop
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for index in out[state]:
+                pattern, category, weight, length = self.matcher.patterns[index]
+                match_start = starts[-length]
+                found.append({
+                    "pattern": pattern, "category": category, "weight": weight,
+                    "start": match_start, "end": end, "text": self._text[match_start - self._text_start:end - self._text_start],
+                })
+        self._state = state
+        self.matches.extend(found)
+        return found
+
+    def _tokenize(self, text: str, end: int) -> list:
+        push, pos, source, base = self._normalizer.push, self._pos, self._text, self._text_start
+        tokens = []
+        for m in TOKEN_RE.finditer(text, 0, end):
+            start, stop = m.span()
+            # Offset absolut, sehingga tanda baca di potongan sebelumnya ikut terlihat
+            tokens += push(m.group(), pos + start, pos + stop, source, base)
+        return tokens
+
+    def feed(self, chunk: str) -> list:
+        self._text += chunk
+        text = self._carry + chunk
+        # Token tidak pernah melewati spasi, jadi semua sebelum spasi terakhir
+        # sudah final; sisanya mungkin bersambung (kata atau "150." + "000")
+        last_space = _LAST_SPACE_RE.search(text)
+        keep_from = last_space.end() if last_space else 0
+        tokens = self._tokenize(text, keep_from)
+        self._pos += keep_from
+        self._carry = text[keep_from:]
+        found = self._consume(tokens)
+        self._trim_text()
+        return found
+
+    def _trim_text(self):
+        """
+        Buang teks yang tidak mungkin lagi masuk match: simpan mulai dari token
+        tertua di _starts (sepanjang pola terpanjang), rangkaian bilangan yang
+        masih ditahan, atau _carry, mana yang paling awal.
+        """
+        keep = self._pos
+        if self._starts:
+            keep = min(keep, self._starts[0])
+        if self._normalizer.span is not None:
+            keep = min(keep, self._normalizer.span[0])
+        if keep > self._text_start:
+            self._text = self._text[keep - self._text_start:]
+            self._text_start = keep
+
+    def finish(self) -> list:
+        """Akhir teks: proses sisa kata dan rangkaian bilangan yang masih ditahan."""
+        tokens = self._tokenize(self._carry, len(self._carry)) + self._normalizer.flush()
+        self._pos += len(self._carry)
+        self._carry = ""
+        return self._consume(tokens)
+
+    @property
+    def risk(self) -> float:
+        return risk_score(self.matches)
+
+    def result(self) -> dict:
+        return {
+            "risk": self.risk,
+            "matches": list(self.matches),
+            "categories": sorted({m["category"] for m in self.matches}),
+        }
+
+
+# Automaton dibangun sekali saja, saat pertama kali dipakai
+lexicon = register("lexicon", lambda: LexiconMatcher(load_lexicon()))
+
+
+def scan_transcript(text: str) -> dict:
+    """Cari pola modus penipuan di transkrip; lihat LexiconMatcher.scan."""
+    return lexicon.get().scan(text)
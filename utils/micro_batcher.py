@@ -0,0 +1,102 @@
+# utils/micro_batcher.py
+
+import asyncio
+import logging
+import time
+
+
+class QueueFullError(Exception):
+    """Antrian batcher penuh; request sebaiknya ditolak (backpressure)."""
+
+
+class MicroBatcher:
+    """
+    Kumpulkan request asyncio menjadi batch untuk fungsi model yang
+    menerima list (mis. predict_fraud_sailor2_batch).
+
+    Batch dikirim begitu berisi max_batch_size item atau item tertua sudah
+    menunggu max_wait_ms. Fungsi batch dijalankan di thread executor, satu
+    batch dalam satu waktu per batcher, agar event loop tidak terblokir.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 max_queue: int = 64):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.items = 0
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name=f"batcher-{self.name}")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, item, timeout: float = None):
+        """
+        Masukkan satu item ke antrian dan tunggu hasilnya.
+        Raises:
+            QueueFullError: antrian penuh
+            asyncio.TimeoutError: hasil tidak siap dalam `timeout` detik
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Antrian {self.name} penuh ({self.queue.maxsize})")
+        # Jika timeout, future dibatalkan dan item yang belum diproses dilewati worker
+        return await asyncio.wait_for(future, timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Request yang sudah timeout tidak perlu ikut dihitung model
+        return [(item, future) for item, future in batch if not future.done()]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(None, self.batch_fn, [item for item, _ in batch])
+            except Exception as e:
+                logging.exception(f"Batch {self.name} gagal")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
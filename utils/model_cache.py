@@ -0,0 +1,113 @@
+# utils/model_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.result_cache import content_hash
+
+# Lokasi file SQLite dan batas ukurannya (total panjang nilai yang disimpan)
+MODEL_CACHE_PATH = os.getenv("MODEL_CACHE_PATH", "model_cache.sqlite")
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "512"))
+
+# Jenis entri: transkrip Whisper (key = hash audio), verdict Sailor2
+# (key = hash transkrip) dan verdict Qwen2-Audio (key = hash audio)
+KINDS = ("transcript", "sailor2", "qwen2")
+
+
+def text_hash(text: str) -> str:
+    return content_hash(text.encode("utf-8"))
+
+
+class ModelCache:
+    """
+    Cache persisten (SQLite) untuk output per model, dengan key
+    (jenis, hash konten, id model). Transkrip disimpan terpisah dari verdict
+    classifier: jika hanya Sailor2 yang berubah, transkrip tetap terpakai dan
+    hanya Sailor2 yang dijalankan ulang (verdict Sailor2 di-key hash transkrip).
+
+    Entri yang paling lama tidak dipakai dihapus saat total ukuran melebihi
+    max_mb. Aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, path: str = MODEL_CACHE_PATH, max_mb: float = MODEL_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 2**20)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, model_id TEXT NOT NULL,"
+            " value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (kind, key, model_id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, kind: str, key: str, model_id: str):
+        """Nilai tersimpan, atau None jika tidak ada."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE kind = ? AND key = ? AND model_id = ?",
+                (kind, key, model_id),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_used = ? WHERE kind = ? AND key = ? AND model_id = ?",
+                (time.time(), kind, key, model_id),
+            )
+            self._db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, kind: str, key: str, model_id: str, value):
+        """Simpan nilai (harus bisa di-serialize ke JSON)."""
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM entries WHERE kind = ? AND key = ? AND model_id = ?",
+                (kind, key, model_id),
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, model_id, data, size, time.time()),
+            )
+            self._size += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        if self._size <= self.max_bytes:
+            return
+        # Hapus sampai 90% dari batas, supaya tidak evict di setiap put
+        target = self._size - int(self.max_bytes * 0.9)
+        freed = 0
+        rows = self._db.execute("SELECT kind, key, model_id, size FROM entries ORDER BY last_used")
+        victims = []
+        for kind, key, model_id, size in rows:
+            if freed >= target:
+                break
+            victims.append((kind, key, model_id))
+            freed += size
+        self._db.executemany("DELETE FROM entries WHERE kind = ? AND key = ? AND model_id = ?", victims)
+        self._size -= freed
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {"entries": counts, "size_mb": round(self._size / 2**20, 2), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,50 +1,155 @@
+import copy
+import os
 import torch
 import librosa
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from transformers import Qwen2AudioForConditionalGeneration, AutoProcessor, BitsAndBytesConfig
 
+from utils import telemetry
+from utils.model_registry import register
 
-MODEL_PATH = "fauzanazz/qwen2-audio-indo-fraudFinetune-4b"
+
+MODEL_PATH = os.getenv("QWEN2_MODEL_PATH", "fauzanazz/qwen2-audio-indo-fraudFinetune-4b")
+# Versi checkpoint untuk key cache hasil (utils.model_cache)
+QWEN2_MODEL_VERSION = os.getenv("QWEN2_MODEL_VERSION", "")
+MODEL_ID = f"{MODEL_PATH}@{QWEN2_MODEL_VERSION}"
 max_seq_length = 2048
+SAMPLING_RATE = 16000
 
-quant_config = BitsAndBytesConfig(
-    load_in_4bit=True,
-    bnb_4bit_compute_dtype=torch.float16,
-    bnb_4bit_use_double_quant=True,
-    bnb_4bit_quant_type="nf4"
-)
-
-processor = AutoProcessor.from_pretrained(MODEL_PATH, trust_remote_code=True, sampling_rate=16000)
-model = Qwen2AudioForConditionalGeneration.from_pretrained(
-    MODEL_PATH,
-    device_map="auto",
-    quantization_config=quant_config,
-)
-
-def predict_fraud_qwen2(audio_path: str) -> dict:
-    conversation = [
-        {"role": "system", "content": "Kamu adalah model yang menenetukan apakah percakapan yang dimasukkan dari dua orang dalam telepon tersebut adalah penipuan telekom atau tidak."},
-        {"role": "user", "content": [
-            {"type": "audio", "audio": audio_path},
-            {"type": "text", "text": "Klasifikasikan audio ini: 0 atau 1."},
-        ]}
-    ]
-    text = processor.apply_chat_template(conversation, add_generation_prompt=True, tokenize=False)
-    audio_data, _ = librosa.load(audio_path, sr=processor.feature_extractor.sampling_rate)
-    audios = [audio_data]
-    inputs = processor(
-        text=text,
-        audio=audios,
-        return_tensors="pt",
-        padding=True,
-        truncation=True
+SYSTEM_PROMPT = "Kamu adalah model yang menenetukan apakah percakapan yang dimasukkan dari dua orang dalam telepon tersebut adalah penipuan telekom atau tidak."
+USER_PROMPT = "Klasifikasikan audio ini: 0 atau 1."
+# Hitung KV cache untuk token prompt sebelum audio sekali per load
+QWEN2_PREFIX_CACHE = os.getenv("QWEN2_PREFIX_CACHE", "1") == "1"
+AUDIO_TOKEN = "<|AUDIO|>"
+
+def _load():
+    # bitsandbytes 4-bit hanya tersedia di CUDA; di CPU model di-load float32
+    quant_config = BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.float16,
+        bnb_4bit_use_double_quant=True,
+        bnb_4bit_quant_type="nf4"
+    ) if torch.cuda.is_available() else None
+
+    processor = AutoProcessor.from_pretrained(MODEL_PATH, trust_remote_code=True, sampling_rate=SAMPLING_RATE)
+    # Left padding supaya generate pada batch melanjutkan dari token terakhir yang asli
+    processor.tokenizer.padding_side = "left"
+    model = Qwen2AudioForConditionalGeneration.from_pretrained(
+        MODEL_PATH,
+        device_map="auto",
+        quantization_config=quant_config,
     )
-    inputs = {k: v.to(model.device) for k, v in inputs.items()}
-    with torch.no_grad():
-        outputs = model.generate(**inputs, max_new_tokens=2)
+
+    # Teks prompt tidak bergantung pada file audio (placeholder audio selalu sama),
+    # jadi chat template cukup di-render sekali per load.
+    prompt_text = processor.apply_chat_template(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": [
+                {"type": "audio", "audio": None},
+                {"type": "text", "text": USER_PROMPT},
+            ]}
+        ],
+        add_generation_prompt=True,
+        tokenize=False,
+    )
+    m = SimpleNamespace(processor=processor, model=model, prompt_text=prompt_text, prefix_ids=None, prefix_cache=None)
+    if QWEN2_PREFIX_CACHE:
+        # System prompt + awal giliran user selalu sama; hanya token audio
+        # dan setelahnya yang perlu di-prefill per request
+        prefix_text = prompt_text[:prompt_text.index(AUDIO_TOKEN)]
+        m.prefix_ids = processor.tokenizer(prefix_text, return_tensors="pt")["input_ids"].to(model.device)
+        with torch.no_grad():
+            m.prefix_cache = model(input_ids=m.prefix_ids, use_cache=True).past_key_values
+    return m
+
+# Processor & model di-load sekali saja, saat pertama kali dipakai
+qwen2 = register("qwen2", _load)
+
+def _load_audio(audio) -> np.ndarray:
+    """Terima path file atau array waveform 16 kHz, kembalikan array."""
+    if isinstance(audio, np.ndarray):
+        return audio
+    with telemetry.span("qwen2.audio_load"):
+        audio_data, _ = librosa.load(audio, sr=SAMPLING_RATE)
+    return audio_data
+
+def _has_prefix(m, input_ids: torch.Tensor) -> bool:
+    if m.prefix_cache is None:
+        return False
+    n = m.prefix_ids.shape[1]
+    return input_ids.shape[1] > n and torch.equal(input_ids[0, :n], m.prefix_ids[0])
+
+def _prepare_inputs(m, audios: list, use_prefix_cache: bool = True) -> dict:
+    """Input generate untuk list waveform, dengan prefix KV cache jika bisa dipakai."""
+    with telemetry.span("qwen2.processor", batch=len(audios)):
+        inputs = m.processor(
+            text=[m.prompt_text] * len(audios),
+            audio=audios,
+            return_tensors="pt",
+            padding=True,
+            truncation=True
+        )
+    with telemetry.span("qwen2.to_device"):
+        inputs = {k: v.to(m.model.device) for k, v in inputs.items()}
+    # Prefix cache hanya untuk satu audio: dengan left padding posisi prefix
+    # berbeda antar baris batch
+    if use_prefix_cache and len(audios) == 1 and _has_prefix(m, inputs["input_ids"]):
+        # generate hanya mem-prefill token setelah prefix; fitur audio tetap
+        # di-merge karena token <|AUDIO|> ada di bagian yang belum di-cache
+        inputs["past_key_values"] = copy.deepcopy(m.prefix_cache)
+    return inputs
+
+def _predict_arrays(audios: list) -> list:
+    m = qwen2.get()
+    telemetry.count("qwen2_audio_seconds", sum(len(a) for a in audios) / SAMPLING_RATE)
+    inputs = _prepare_inputs(m, audios)
+    with telemetry.span("qwen2.generate", batch=len(audios)), torch.no_grad():
+        outputs = m.model.generate(**inputs, max_new_tokens=2, pad_token_id=m.processor.tokenizer.pad_token_id)
     generated_ids = outputs[:, inputs["input_ids"].size(1):]
-    response = processor.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=False)[0]
-    fraud = 1 if "1" in response.strip().split() else 0
-    return {
-        "fraud": fraud,
-        "raw_pred": response
-    }
\ No newline at end of file
+    telemetry.count("qwen2_tokens_in", int(inputs["attention_mask"].sum()))
+    telemetry.count("qwen2_tokens_out", generated_ids.numel())
+    with telemetry.span("qwen2.decode"):
+        responses = m.processor.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+    return [
+        {
+            "fraud": 1 if "1" in response.strip().split() else 0,
+            "raw_pred": response
+        }
+        for response in responses
+    ]
+
+def predict_fraud_qwen2(audio) -> dict:
+    """
+    Prediksi fraud langsung dari audio menggunakan Qwen2-Audio.
+    Args:
+        audio: path file audio, atau waveform mono float32 16 kHz
+    Returns:
+        dict: {'fraud': 0/1, 'raw_pred': <output model>}
+    """
+    return _predict_arrays([_load_audio(audio)])[0]
+
+def predict_fraud_qwen2_batch(audios: list, batch_size: int = 4, num_workers: int = 4) -> list:
+    """
+    Prediksi fraud untuk banyak audio sekaligus.
+    Decoding audio untuk batch berikutnya berjalan di thread pool
+    selagi batch saat ini diproses model.
+    Args:
+        audios: list path file audio atau array waveform 16 kHz
+        batch_size: jumlah audio per panggilan generate
+        num_workers: jumlah thread untuk decoding audio
+    Returns:
+        list of dict seperti predict_fraud_qwen2, urutan sama dengan input
+    """
+    batches = [audios[i:i + batch_size] for i in range(0, len(audios), batch_size)]
+    results = []
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        pending = [pool.submit(_load_audio, a) for a in batches[0]] if batches else []
+        for b in range(len(batches)):
+            arrays = [f.result() for f in pending]
+            if b + 1 < len(batches):
+                pending = [pool.submit(_load_audio, a) for a in batches[b + 1]]
+            results.extend(_predict_arrays(arrays))
+    return results
@@ -0,0 +1,95 @@
+# utils/model_registry.py
+
+import gc
+import importlib
+import logging
+import sys
+import threading
+import time
+
+# Modul yang mendaftarkan model tertentu; dipakai agar warmup("sailor2")
+# bisa dipanggil tanpa harus meng-import modulnya lebih dulu.
+MODEL_MODULES = {
+    "whisper": "utils.model_whisper",
+    "sailor2": "utils.model_sailor2",
+    "qwen2": "utils.model_qwen2",
+}
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class LazyModel:
+    """
+    Handle model yang baru di-load saat pertama kali dipakai.
+    Loading dijaga lock sehingga aman dipanggil dari beberapa thread.
+    """
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self.load_time = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    start = time.perf_counter()
+                    self._value = self._loader()
+                    self.load_time = time.perf_counter() - start
+                    logging.info(f"Model '{self.name}' dimuat dalam {self.load_time:.2f}s")
+        return self._value
+
+    def unload(self):
+        with self._lock:
+            if self._value is None:
+                return
+            self._value = None
+        gc.collect()
+        # Jangan import torch hanya untuk membersihkan cache
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logging.info(f"Model '{self.name}' dilepas dari memori")
+
+
+def register(name: str, loader) -> LazyModel:
+    """Daftarkan loader untuk model `name` dan kembalikan handle lazy-nya."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = LazyModel(name, loader)
+        return _registry[name]
+
+
+def get_handle(name: str) -> LazyModel:
+    if name not in _registry and name in MODEL_MODULES:
+        importlib.import_module(MODEL_MODULES[name])
+    if name not in _registry:
+        raise KeyError(f"Model tidak dikenal: {name}")
+    return _registry[name]
+
+
+def warmup(*names) -> dict:
+    """
+    Load model sekarang (default: semua model di MODEL_MODULES).
+    Returns dict {nama: waktu load dalam detik}.
+    """
+    for name in names or MODEL_MODULES:
+        get_handle(name).get()
+    return load_times()
+
+
+def unload(*names):
+    """Lepaskan model dari memori (default: semua yang sudah di-load)."""
+    for name in names or list(_registry):
+        get_handle(name).unload()
+
+
+def load_times() -> dict:
+    return {name: handle.load_time for name, handle in _registry.items() if handle.loaded}
@@ -1,47 +1,275 @@
 # utils/model_sailor2.py
 
+import copy
+import os
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 import re
+from collections import defaultdict
+from types import SimpleNamespace
 
-# Path ke model Sailor2 hasil fine-tune (lokal)
-MODEL_PATH = "fauzanazz/sailor2-fraudFinetuned-indo-4b"
+from utils import telemetry
+from utils.cpu_profile import configure_threads, maybe_compile, quantize_int8
+from utils.model_registry import register
+
+# Path ke model Sailor2 hasil fine-tune (lokal); bisa diganti lewat env,
+# mis. checkpoint kecil untuk benchmark di CI tanpa GPU
+MODEL_PATH = os.getenv("SAILOR2_MODEL_PATH", "fauzanazz/sailor2-fraudFinetuned-indo-4b")
 max_seq_length = 2048
+NUM_CLASSES = 2
 
-# Load model & tokenizer sekali saja
-tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_PATH,
-    device_map="auto",
-    torch_dtype=torch.float16,  # atau None jika tidak pakai quant
-)
+# Profil inference: "default" (float16 di GPU, float32 di CPU) atau
+# "cpu" (dynamic quantization int8 + pengaturan thread, untuk node tanpa GPU)
+SAILOR2_PROFILE = os.getenv("SAILOR2_PROFILE", "default")
+# Hitung KV cache untuk bagian awal prompt yang konstan sekali per load,
+# sehingga prefill per request hanya untuk transkrip
+SAILOR2_PREFIX_CACHE = os.getenv("SAILOR2_PREFIX_CACHE", "1") == "1"
+# Mode windowed: panjang window transkrip dalam token (0 = sisa budget
+# max_seq_length setelah template prompt), overlap antar window, dan
+# agregasi probabilitas penipuan antar window ("max" atau "mean")
+SAILOR2_WINDOW_TOKENS = int(os.getenv("SAILOR2_WINDOW_TOKENS", "0"))
+SAILOR2_WINDOW_OVERLAP = int(os.getenv("SAILOR2_WINDOW_OVERLAP", "256"))
+SAILOR2_AGGREGATE = os.getenv("SAILOR2_AGGREGATE", "max")
+# Versi checkpoint (naikkan setelah fine-tune ulang di path yang sama) untuk
+# key cache hasil di utils.model_cache
+SAILOR2_MODEL_VERSION = os.getenv("SAILOR2_MODEL_VERSION", "")
+# Versi template prompt juga masuk key: verdict dari prompt lama ("kelas" tanpa
+# spasi, logit dibaca satu posisi terlalu awal) tidak boleh dipakai lagi
+PROMPT_VERSION = 2
+MODEL_ID = f"{MODEL_PATH}@{SAILOR2_MODEL_VERSION}:{SAILOR2_PROFILE}:prompt-v{PROMPT_VERSION}"
+
+def load_sailor2(profile: str = SAILOR2_PROFILE):
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    if profile == "cpu":
+        configure_threads()
+        model = AutoModelForCausalLM.from_pretrained(MODEL_PATH, torch_dtype=torch.float32)
+        model = maybe_compile(quantize_int8(model.eval()))
+    elif profile == "default":
+        model = AutoModelForCausalLM.from_pretrained(
+            MODEL_PATH,
+            device_map="auto",
+            # float16 hanya di GPU; di CPU banyak operasi fp16 lambat/tidak didukung
+            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+        )
+    else:
+        raise ValueError(f"Unknown Sailor2 profile: {profile}")
+    # Left padding supaya posisi terakhir tiap baris di batch adalah token asli
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    # Token id untuk digit kelas "1" (percakapan biasa) dan "2" (penipuan),
+    # sama seperti `number_token_ids` di notebook fine-tune.
+    class_token_ids = [
+        tokenizer.encode(str(i), add_special_tokens=False)[0]
+        for i in range(1, NUM_CLASSES + 1)
+    ]
+    m = SimpleNamespace(tokenizer=tokenizer, model=model, class_token_ids=class_token_ids, prefix_len=0, prefix_cache=None)
+    if SAILOR2_PREFIX_CACHE:
+        _build_prefix_cache(m)
+    return m
+
+# Model & tokenizer di-load sekali saja, saat pertama kali dipakai
+sailor2 = register("sailor2", load_sailor2)
 
 PROMPT_TEMPLATE = (
     "Berdasarkan  percakapan 2 orang melalui telepon berikut, klasifikasikan label yang 1 untuk percakapan biasa dan 2 untuk penipuan telekom:\n"
     "{}\n"
-    "Klasifikasi yang benar adalah: kelas"
+    # Spasi di akhir disengaja: data training berformat "kelas {label}" dan
+    # tokenizer memisahkan spasi dari digit, sehingga logit di posisi
+    # terakhir prompt inilah yang memprediksi token kelas "1"/"2"
+    "Klasifikasi yang benar adalah: kelas "
 )
+# Bagian sebelum dan sesudah transkrip
+PROMPT_PREFIX, PROMPT_SUFFIX = PROMPT_TEMPLATE.split("{}")
+
+def _build_prefix_cache(m):
+    prefix_ids = m.tokenizer(PROMPT_PREFIX, return_tensors="pt")["input_ids"].to(m.model.device)
+    with torch.no_grad():
+        m.prefix_cache = m.model(input_ids=prefix_ids, use_cache=True).past_key_values
+    m.prefix_len = prefix_ids.shape[1]
+
+def _encode(m, transcripts: list) -> list:
+    """
+    Tokenisasi prompt untuk tiap transkrip. Jika prefix cache aktif, hanya
+    bagian setelah prefix (transkrip + kalimat penutup) yang ditokenisasi.
+    """
+    with telemetry.span("sailor2.tokenize", batch=len(transcripts)):
+        if m.prefix_cache is None:
+            prompts = [PROMPT_TEMPLATE.format(t.strip()) for t in transcripts]
+            return m.tokenizer(prompts, truncation=True, max_length=max_seq_length)["input_ids"]
+        suffixes = [t.strip() + PROMPT_SUFFIX for t in transcripts]
+        return m.tokenizer(
+            suffixes, add_special_tokens=False, truncation=True, max_length=max_seq_length - m.prefix_len
+        )["input_ids"]
+
+def _class_probs(m, inputs) -> torch.Tensor:
+    """
+    Satu forward pass (prefill) lalu softmax atas logit token kelas
+    di posisi terakhir. Returns tensor [batch, NUM_CLASSES].
+    """
+    inputs = dict(inputs)
+    if "attention_mask" in inputs:
+        # Posisi dihitung dari attention mask agar baris yang di-pad kiri
+        # mendapat position id yang sama seperti saat tidak di-batch
+        position_ids = inputs["attention_mask"].long().cumsum(-1) - 1
+        inputs["position_ids"] = position_ids.clamp(min=0)
+    with torch.no_grad():
+        logits = m.model(**inputs).logits[:, -1, :]
+    class_logits = logits[:, m.class_token_ids].float()
+    return torch.softmax(class_logits, dim=-1)
+
+def _class_probs_prefixed(m, suffix_ids: list) -> torch.Tensor:
+    """
+    Seperti _class_probs, tetapi prefix prompt diambil dari KV cache sehingga
+    prefill hanya mencakup transkrip + kalimat penutup. Batch di-pad kanan
+    (prefix harus menempati posisi awal yang sama di semua baris) dan logit
+    dibaca dari token asli terakhir tiap baris.
+    """
+    n = len(suffix_ids)
+    lengths = torch.tensor([len(ids) for ids in suffix_ids])
+    input_ids = torch.full((n, int(lengths.max())), m.tokenizer.pad_token_id, dtype=torch.long)
+    for row, ids in enumerate(suffix_ids):
+        input_ids[row, :len(ids)] = torch.tensor(ids)
+    suffix_mask = (torch.arange(input_ids.shape[1])[None, :] < lengths[:, None]).long()
+    attention_mask = torch.cat([torch.ones(n, m.prefix_len, dtype=torch.long), suffix_mask], dim=1)
+
+    # Cache di-copy karena forward menambahkan KV transkrip ke dalamnya
+    cache = copy.deepcopy(m.prefix_cache)
+    if n > 1:
+        cache.batch_repeat_interleave(n)
+    device = m.model.device
+    with torch.no_grad():
+        logits = m.model(
+            input_ids=input_ids.to(device),
+            attention_mask=attention_mask.to(device),
+            past_key_values=cache,
+            use_cache=True,
+        ).logits
+    last = logits[torch.arange(n, device=logits.device), (lengths - 1).to(logits.device)]
+    return torch.softmax(last[:, m.class_token_ids].float(), dim=-1)
+
+def _score_ids(m, ids: list) -> torch.Tensor:
+    """Probabilitas kelas untuk satu batch hasil _encode."""
+    # Token yang benar-benar di-prefill (tanpa padding dan prefix yang di-cache)
+    telemetry.count("sailor2_tokens_in", sum(len(x) for x in ids))
+    telemetry.count("sailor2_tokens_out", len(ids))
+    with telemetry.span("sailor2.prefill", batch=len(ids)):
+        if m.prefix_cache is not None:
+            return _class_probs_prefixed(m, ids)
+        inputs = m.tokenizer.pad({"input_ids": ids}, padding=True, return_tensors="pt").to(m.model.device)
+        return _class_probs(m, inputs)
+
+def _split_windows(m, transcript: str, window_tokens: int, overlap_tokens: int) -> list:
+    """
+    Pecah transkrip menjadi window token yang saling overlap. Window terakhir
+    selalu mencakup akhir transkrip, dan template prompt (termasuk kalimat
+    penutup "kelas") tetap utuh di setiap window.
+    """
+    transcript = transcript.strip()
+    if window_tokens <= 0:
+        template_len = len(m.tokenizer(PROMPT_TEMPLATE.format(""))["input_ids"])
+        # Sisakan sedikit ruang: decode lalu tokenisasi ulang bisa menggeser jumlah token
+        window_tokens = max_seq_length - template_len - 16
+    ids = m.tokenizer(transcript, add_special_tokens=False)["input_ids"]
+    if len(ids) <= window_tokens:
+        return [transcript]
+    stride = max(window_tokens - overlap_tokens, 1)
+    return [
+        m.tokenizer.decode(ids[start:start + window_tokens])
+        for start in range(0, len(ids) - overlap_tokens, stride)
+    ]
+
+def _score_windowed(m, transcripts: list, batch_size: int, window_tokens: int,
+                    overlap_tokens: int, aggregate: str) -> list:
+    if aggregate not in ("max", "mean"):
+        raise ValueError(f"Unknown aggregate: {aggregate}")
+    windows, owner = [], []
+    for i, transcript in enumerate(transcripts):
+        parts = _split_windows(m, transcript, window_tokens, overlap_tokens)
+        windows.extend(parts)
+        owner.extend([i] * len(parts))
+
+    # Semua window (dari semua transkrip) di-bucket bersama berdasarkan panjang
+    encoded = _encode(m, windows)
+    order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+    fraud_probs = [None] * len(encoded)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        probs = _score_ids(m, [encoded[i] for i in bucket])
+        for row, idx in enumerate(bucket):
+            fraud_probs[idx] = float(probs[row, 1].item())
+
+    # Kelompokkan per transkrip dalam satu lintasan (urutan window tetap)
+    probs_by_owner = defaultdict(list)
+    for prob, i in zip(fraud_probs, owner):
+        probs_by_owner[i].append(prob)
+
+    results = []
+    for i in range(len(transcripts)):
+        window_probs = probs_by_owner[i]
+        fraud_prob = max(window_probs) if aggregate == "max" else sum(window_probs) / len(window_probs)
+        fraud = 1 if fraud_prob > 0.5 else 0
+        results.append({
+            "fraud": fraud,
+            "raw_pred": "2" if fraud else "1",
+            "fraud_prob": fraud_prob,
+            "window_probs": window_probs,
+        })
+    return results
+
+def _result_from_probs(probs: torch.Tensor) -> dict:
+    pred_class = int(probs.argmax().item()) + 1
+    return {
+        "fraud": 1 if pred_class == 2 else 0,
+        "raw_pred": str(pred_class),
+        "fraud_prob": float(probs[1].item()),
+    }
 
-def predict_fraud_sailor2(transcript: str) -> dict:
+def predict_fraud_sailor2(transcript: str, mode: str = "logits") -> dict:
     """
     Prediksi fraud menggunakan Sailor2, input transkrip text.
     Args:
         transcript: hasil transkripsi audio (string)
+        mode: "logits" (satu forward pass, baca logit token kelas; transkrip
+              yang melebihi max_seq_length terpotong), "windowed" (transkrip
+              panjang dipecah menjadi window yang overlap, dinilai dalam satu
+              batch lalu diagregasi, lihat SAILOR2_AGGREGATE) atau
+              "generate" (cara lama: generate lalu parse teks)
     Returns:
-        dict: {'fraud': 0/1, 'raw_pred': <output model>}
+        dict: {'fraud': 0/1, 'raw_pred': <output model>, 'fraud_prob': <probabilitas kelas penipuan>}
+              ('fraud_prob' tidak ada di mode "generate"; mode "windowed"
+              menambahkan 'window_probs' per window)
     """
+    m = sailor2.get()
+    if mode == "logits":
+        return _result_from_probs(_score_ids(m, _encode(m, [transcript]))[0])
+    if mode == "windowed":
+        return predict_fraud_sailor2_batch([transcript], windowed=True)[0]
+    if mode != "generate":
+        raise ValueError(f"Unknown mode: {mode}")
+
     prompt = PROMPT_TEMPLATE.format(transcript.strip())
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=max_seq_length).to(model.device)
-    with torch.no_grad():
-        outputs = model.generate(
+    with telemetry.span("sailor2.tokenize", batch=1):
+        inputs = m.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=max_seq_length)
+    with telemetry.span("sailor2.to_device"):
+        inputs = inputs.to(m.model.device)
+
+    with telemetry.span("sailor2.generate"), torch.no_grad():
+        outputs = m.model.generate(
             **inputs,
             max_new_tokens=2,
             do_sample=False,
-            pad_token_id=tokenizer.eos_token_id,
+            pad_token_id=m.tokenizer.eos_token_id,
         )
     generated = outputs[:, inputs["input_ids"].shape[1]:]
-    pred_text = tokenizer.batch_decode(generated, skip_special_tokens=True)[0]
-    match = re.search(r"\b([12])\b", pred_text)
+    telemetry.count("sailor2_tokens_in", inputs["input_ids"].numel())
+    telemetry.count("sailor2_tokens_out", generated.numel())
+    with telemetry.span("sailor2.decode"):
+        pred_text = m.tokenizer.batch_decode(generated, skip_special_tokens=True)[0]
+    # Prompt berakhir tepat sebelum token kelas, jadi kelas adalah digit pertama
+    # yang di-generate (token berikutnya bisa berupa apa saja, mis. "22")
+    match = re.match(r"\s*([12])", pred_text)
     if match:
         pred_class = int(match.group(1))
     else:
@@ -50,4 +278,37 @@ def predict_fraud_sailor2(transcript: str) -> dict:
     return {
         "fraud": fraud,
         "raw_pred": pred_text
-    }
\ No newline at end of file
+    }
+
+def predict_fraud_sailor2_batch(transcripts: list, batch_size: int = 8, windowed: bool = False,
+                                window_tokens: int = SAILOR2_WINDOW_TOKENS,
+                                overlap_tokens: int = SAILOR2_WINDOW_OVERLAP,
+                                aggregate: str = SAILOR2_AGGREGATE) -> list:
+    """
+    Prediksi fraud untuk banyak transkrip sekaligus (mode logits).
+    Input diurutkan berdasarkan panjang token lalu dipotong per bucket
+    berukuran batch_size, supaya padding di tiap batch minimal.
+    Args:
+        transcripts: list transkrip (string)
+        batch_size: jumlah transkrip (atau window) per forward pass
+        windowed: pecah transkrip panjang menjadi window yang overlap
+                  alih-alih memotong akhir transkrip
+        window_tokens: panjang window dalam token (0 = sisa budget prompt)
+        overlap_tokens: jumlah token overlap antar window
+        aggregate: "max" atau "mean" dari probabilitas penipuan per window
+    Returns:
+        list of dict seperti predict_fraud_sailor2, urutan sama dengan input
+    """
+    m = sailor2.get()
+    if windowed:
+        return _score_windowed(m, transcripts, batch_size, window_tokens, overlap_tokens, aggregate)
+    encoded = _encode(m, transcripts)
+    order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+
+    results = [None] * len(encoded)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        probs = _score_ids(m, [encoded[i] for i in bucket])
+        for row, idx in enumerate(bucket):
+            results[idx] = _result_from_probs(probs[row])
+    return results
@@ -1,18 +1,112 @@
 # utils/model_whisper.py
 
-import whisper
+import os
 
-# Load Whisper model sekali saja (bisa ganti "base" ke "small", "medium", "large" jika mau)
-whisper_model = whisper.load_model("base")
+import numpy as np
 
-def transcribe_audio(audio_path: str, language: str = "indonesian") -> str:
+from utils import telemetry
+from utils.audio_processing import SAMPLE_RATE, decode_audio, remove_silence
+from utils.model_registry import register
+
+# Backend transkripsi: "openai" (openai-whisper, PyTorch) atau
+# "faster-whisper" (CTranslate2, mendukung int8 di CPU)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai")
+# Ukuran model Whisper ("tiny", "base", "small", "medium", "large") atau path checkpoint
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+# Tipe komputasi CTranslate2 ("int8", "int8_float16", "float16", "float32"); hanya faster-whisper
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+# Jumlah thread CPU (0 = otomatis)
+WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", "0"))
+# Buang bagian hening sebelum decoding (VAD berbasis energi)
+WHISPER_VAD = os.getenv("WHISPER_VAD", "1") == "1"
+
+# Id konfigurasi untuk cache hasil (utils.model_cache): transkrip berubah
+# jika backend, model, tipe komputasi atau VAD berubah
+WHISPER_MODEL_ID = ":".join(
+    [WHISPER_BACKEND, WHISPER_MODEL]
+    + ([WHISPER_COMPUTE_TYPE] if WHISPER_BACKEND == "faster-whisper" else [])
+    + (["vad"] if WHISPER_VAD else [])
+)
+
+# faster-whisper memakai kode bahasa, openai-whisper menerima nama bahasa
+LANGUAGE_CODES = {"indonesian": "id", "english": "en"}
+
+
+class OpenAIWhisperBackend:
+    def __init__(self, model_size: str, threads: int = 0):
+        import torch
+        import whisper
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, language: str) -> dict:
+        result = self.model.transcribe(audio, language=language)
+        return {
+            "text": result["text"],
+            "segments": [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+                for seg in result["segments"]
+            ],
+        }
+
+
+class FasterWhisperBackend:
+    def __init__(self, model_size: str, compute_type: str = "int8", threads: int = 0):
+        import torch
+        from faster_whisper import WhisperModel
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe(self, audio, language: str) -> dict:
+        segments, _ = self.model.transcribe(audio, language=LANGUAGE_CODES.get(language, language))
+        segments = [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments]
+        return {"text": "".join(seg["text"] for seg in segments), "segments": segments}
+
+
+def load_backend(backend: str = WHISPER_BACKEND, model_size: str = WHISPER_MODEL,
+                 compute_type: str = WHISPER_COMPUTE_TYPE, threads: int = WHISPER_THREADS):
+    if backend == "openai":
+        return OpenAIWhisperBackend(model_size, threads)
+    if backend == "faster-whisper":
+        return FasterWhisperBackend(model_size, compute_type, threads)
+    raise ValueError(f"Unknown Whisper backend: {backend}")
+
+# Load Whisper model sekali saja, saat pertama kali dipakai
+whisper_model = register("whisper", load_backend)
+
+def transcribe_audio(audio, language: str = "indonesian", vad: bool = WHISPER_VAD) -> str:
     """
     Transkripsi audio menggunakan Whisper lokal.
     Args:
-        audio_path: path ke file audio (wav/mp3/mp4/ogg/dll)
+        audio: path ke file audio (wav/mp3/mp4/ogg/dll), atau waveform
+               mono float32 16 kHz (lihat audio_processing.decode_audio)
         language: bahasa audio (default: "indonesian")
+        vad: buang bagian hening sebelum decoding (default: env WHISPER_VAD)
     Returns:
         transcript: hasil transkripsi (string)
     """
-    result = whisper_model.transcribe(audio_path, language=language)
-    return result["text"]
\ No newline at end of file
+    if vad:
+        if not isinstance(audio, np.ndarray):
+            with telemetry.span("whisper.audio_load"):
+                audio = decode_audio(audio)
+        telemetry.count("whisper_audio_seconds", len(audio) / SAMPLE_RATE)
+        with telemetry.span("whisper.vad"):
+            audio = remove_silence(audio)
+        if len(audio) == 0:
+            return ""
+    if isinstance(audio, np.ndarray):
+        telemetry.count("whisper_speech_seconds", len(audio) / SAMPLE_RATE)
+    with telemetry.span("whisper.transcribe", backend=WHISPER_BACKEND):
+        return whisper_model.get().transcribe(audio, language)["text"]
+
+def transcribe_segments(audio, language: str = "indonesian") -> list:
+    """
+    Sama seperti transcribe_audio, tetapi mengembalikan segmen bertimestamp.
+    Tanpa VAD, agar timestamp tetap sesuai posisi di audio asli.
+    Returns:
+        list of dict: [{'start': detik, 'end': detik, 'text': str}, ...]
+    """
+    return whisper_model.get().transcribe(audio, language)["segments"]
@@ -0,0 +1,185 @@
+# utils/pipeline.py
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils import cascade, prefilter, telemetry
+from utils.audio_processing import decode_audio
+from utils.lexicon import scan_transcript
+from utils.model_cache import text_hash
+from utils.model_whisper import WHISPER_MODEL_ID, transcribe_audio
+from utils.model_sailor2 import MODEL_ID as SAILOR2_MODEL_ID, predict_fraud_sailor2
+from utils.model_qwen2 import MODEL_ID as QWEN2_MODEL_ID, predict_fraud_qwen2
+from utils.result_cache import content_hash
+
+# Urutan stage sesuai hasil yang dikirim ke callback
+STAGES = ("transcript", "sailor2", "qwen2")
+
+
+class StageTimer:
+    """Catat waktu mulai/selesai tiap stage relatif terhadap awal pipeline."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def run(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.timings[name] = {
+                    "start": round(start - self.t0, 4),
+                    "end": round(end - self.t0, 4),
+                    "duration": round(end - start, 4),
+                }
+
+    def summary(self) -> dict:
+        total = time.perf_counter() - self.t0
+        sequential = sum(t["duration"] for t in self.timings.values())
+        return {
+            "stages": dict(self.timings),
+            "wall_time": round(total, 4),
+            # Total waktu jika semua stage dijalankan berurutan
+            "sequential_time": round(sequential, 4),
+        }
+
+
+def audio_key(audio) -> str:
+    """Hash isi audio (path, bytes, atau waveform) untuk key cache."""
+    if isinstance(audio, np.ndarray):
+        return content_hash(audio.tobytes())
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            return content_hash(f.read())
+    return content_hash(audio)
+
+
+def run_analysis(audio, on_result=None, cache=None, cascade_band=None, use_prefilter=False) -> dict:
+    """
+    Jalankan Whisper -> Sailor2 dan Qwen2-Audio secara paralel.
+    Qwen2-Audio hanya butuh audio, jadi tidak perlu menunggu transkrip.
+    (Saat TORCH_PROFILE_DIR diisi, kedua cabang berjalan berurutan di thread pemanggil.)
+    Audio di-decode sekali menjadi waveform 16 kHz yang dipakai kedua cabang,
+    dan hanya jika ada model yang benar-benar perlu menjalankannya.
+    Args:
+        audio: path file audio, bytes isi file, atau waveform 16 kHz
+        on_result: callback opsional on_result(stage, value), dipanggil di thread
+                   pemanggil begitu sebuah stage selesai (lihat STAGES)
+        cache: utils.model_cache.ModelCache opsional; output tiap model yang
+               sudah ada di cache tidak dihitung ulang
+        cascade_band: (low, high) opsional untuk mode cascade: Qwen2-Audio baru
+                      dijalankan setelah Sailor2, dan hanya jika probabilitas
+                      penipuannya di dalam band (lihat utils.cascade); jika tidak,
+                      stage 'qwen2' bernilai None
+        use_prefilter: jalankan utils.prefilter sebelum Sailor2; transkrip yang
+                       jelas bukan penipuan tidak diteruskan ke Sailor2
+    Returns:
+        dict: {'transcript': str, 'sailor2': dict, 'qwen2': dict/None, 'timings': dict,
+               'cached': list stage yang diambil dari cache,
+               'cascade': verdict utils.cascade.decide (hanya mode cascade),
+               'lexicon': pola modus penipuan di transkrip, lihat utils.lexicon}
+    """
+    # Opt-in: TORCH_PROFILE_DIR membungkus request ini dengan torch.profiler
+    with telemetry.profile("analysis"):
+        return _run_analysis(audio, on_result, cache, cascade_band, use_prefilter)
+
+
+def _run_analysis(audio, on_result, cache, cascade_band, use_prefilter) -> dict:
+    timer = StageTimer()
+    events = queue.Queue()
+    cached_stages = []
+    key = audio_key(audio) if cache is not None else None
+    decode_lock = threading.Lock()
+    decoded = {}
+
+    def get_waveform():
+        # Decode lazy: jika transkrip dan verdict Qwen2-Audio sudah ada di cache
+        # (atau Qwen2-Audio dilewati cascade), audio tidak perlu di-decode
+        with decode_lock:
+            if "waveform" not in decoded:
+                decoded["waveform"] = audio if isinstance(audio, np.ndarray) else timer.run("decode", decode_audio, audio)
+            return decoded["waveform"]
+
+    def cached(kind, cache_key, model_id, fn):
+        if cache is None:
+            return fn()
+        value = cache.get(kind, cache_key, model_id)
+        if value is not None:
+            cached_stages.append(kind)
+            return value
+        value = fn()
+        cache.put(kind, cache_key, model_id, value)
+        return value
+
+    def text_branch():
+        transcript = timer.run(
+            "whisper", cached, "transcript", key, WHISPER_MODEL_ID, lambda: transcribe_audio(get_waveform())
+        )
+        events.put(("transcript", transcript))
+        if use_prefilter:
+            sailor2_id = f"{SAILOR2_MODEL_ID}+{prefilter.model_id()}"
+            predict = lambda: prefilter.predict_gated([transcript], lambda ts: [predict_fraud_sailor2(ts[0])])[0]
+        else:
+            sailor2_id, predict = SAILOR2_MODEL_ID, lambda: predict_fraud_sailor2(transcript)
+        sailor2 = timer.run("sailor2", cached, "sailor2", key and text_hash(transcript), sailor2_id, predict)
+        events.put(("sailor2", sailor2))
+        return sailor2
+
+    def audio_branch():
+        events.put(("qwen2", timer.run(
+            "qwen2", cached, "qwen2", key, QWEN2_MODEL_ID, lambda: predict_fraud_qwen2(get_waveform())
+        )))
+
+    def cascade_branch():
+        if cascade.needs_audio_model(text_branch(), cascade_band):
+            telemetry.count("cascade_escalated")
+            audio_branch()
+        else:
+            telemetry.count("cascade_skipped")
+            events.put(("qwen2", None))
+
+    def guarded(branch):
+        try:
+            branch()
+        except BaseException as e:
+            events.put(("error", e))
+
+    results = {}
+
+    def collect():
+        while len(results) < len(STAGES):
+            stage, value = events.get()
+            if stage == "error":
+                raise value
+            results[stage] = value
+            if on_result is not None:
+                on_result(stage, value)
+
+    branches = [text_branch, audio_branch] if cascade_band is None else [cascade_branch]
+    if telemetry.profiling_enabled():
+        # torch.profiler hanya merekam op di thread yang memulainya; saat
+        # profiling, cabang dijalankan berurutan di thread ini agar op model ikut tercatat
+        for branch in branches:
+            guarded(branch)
+        collect()
+    else:
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline") as pool:
+            for branch in branches:
+                pool.submit(guarded, branch)
+            collect()
+
+    # Pencocokan lexicon cukup murah untuk selalu dijalankan pada transkrip akhir
+    results["lexicon"] = scan_transcript(results["transcript"])
+    results["timings"] = timer.summary()
+    results["cached"] = sorted(cached_stages)
+    if cascade_band is not None:
+        results["cascade"] = cascade.decide(results["sailor2"], results["qwen2"], cascade_band)
+    return results
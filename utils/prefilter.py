@@ -0,0 +1,256 @@
+"""
+Pre-filter ringan di depan Sailor2: regresi logistik atas fitur n-gram kata
+yang di-hash, disimpan sebagai array NumPy (.npz) dan dijalankan di CPU.
+
+Model dilatih dari label dataset.csv sekaligus verdict Sailor2 (distilasi):
+target tiap transkrip adalah campuran label dan probabilitas penipuan dari
+Sailor2. Threshold dikalibrasi pada split validasi sehingga hanya panggilan
+yang jelas bukan penipuan (di bawah threshold) yang tidak diteruskan ke
+Sailor2; maksimal --max-miss dari panggilan penipuan ikut tersaring.
+
+Contoh:
+    python -m utils.batch_score dataset_creation/dataset.csv --use-manifest-transcripts --skip-qwen2 --output teacher.jsonl
+    python -m utils.prefilter dataset_creation/dataset.csv --teacher teacher.jsonl --output prefilter.npz
+    PREFILTER_ENABLED=1 streamlit run app.py
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils import telemetry
+from utils.model_registry import register
+from utils.result_cache import content_hash
+
+# File model hasil training dan apakah pre-filter dipakai secara default
+PREFILTER_PATH = os.getenv("PREFILTER_PATH", "prefilter.npz")
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "0") == "1"
+# Override threshold hasil kalibrasi (kosong = pakai yang tersimpan di file)
+PREFILTER_THRESHOLD = os.getenv("PREFILTER_THRESHOLD")
+
+NUM_FEATURES = 2**18
+TOKEN_RE = re.compile(r"\w+")
+# Pengali untuk menggabungkan hash dua kata berurutan menjadi hash bigram
+_BIGRAM_MULT = np.uint64(0x9E3779B1)
+
+
+def featurize(transcripts: list, num_features: int = NUM_FEATURES):
+    """
+    Fitur sparse untuk satu batch transkrip: unigram dan bigram kata yang
+    di-hash (dengan tanda ±1 dari bit hash), bobot log(1 + jumlah), dan
+    dinormalisasi L2 per transkrip.
+    Returns:
+        (rows, cols, values): array sejajar seperti format COO
+    """
+    hashes, lengths = [], []
+    for text in transcripts:
+        tokens = TOKEN_RE.findall(text.lower())
+        hashes.extend(zlib.crc32(token.encode("utf-8")) for token in tokens)
+        lengths.append(len(tokens))
+    token_hash = np.array(hashes, dtype=np.uint64)
+    token_row = np.repeat(np.arange(len(transcripts)), lengths)
+
+    # Bigram hanya antara token yang berurutan di transkrip yang sama
+    same_row = token_row[1:] == token_row[:-1]
+    bigram_hash = ((token_hash[:-1] * _BIGRAM_MULT) ^ token_hash[1:])[same_row] & np.uint64(0xFFFFFFFF)
+    all_hash = np.concatenate([token_hash, bigram_hash])
+    all_row = np.concatenate([token_row, token_row[1:][same_row]])
+
+    cols = (all_hash % np.uint64(num_features)).astype(np.int64)
+    signs = np.where((all_hash >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+    # Jumlahkan fitur yang sama di baris yang sama
+    keys, inverse = np.unique(all_row * num_features + cols, return_inverse=True)
+    counts = np.bincount(inverse, weights=signs).astype(np.float32)
+    rows, cols = keys // num_features, keys % num_features
+    values = np.sign(counts) * np.log1p(np.abs(counts))
+    norms = np.sqrt(np.bincount(rows, weights=values**2, minlength=len(transcripts)))
+    values = values / np.maximum(norms[rows], 1e-12)
+    return rows, cols, values.astype(np.float32)
+
+
+def _logits(weights: np.ndarray, bias: float, features, n: int) -> np.ndarray:
+    rows, cols, values = features
+    return np.bincount(rows, weights=values * weights[cols], minlength=n) + bias
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+def train(transcripts: list, targets: np.ndarray, num_features: int = NUM_FEATURES, epochs: int = 200,
+          lr: float = 0.5, l2: float = 1e-6):
+    """
+    Regresi logistik dengan target lunak (0..1), full-batch Adagrad.
+    Returns:
+        (weights, bias)
+    """
+    features = featurize(transcripts, num_features)
+    rows, cols, values = features
+    n = len(transcripts)
+    targets = np.asarray(targets, dtype=np.float64)
+    weights = np.zeros(num_features, dtype=np.float64)
+    bias = 0.0
+    grad_sq = np.full(num_features, 1e-8)
+    bias_sq = 1e-8
+    for epoch in range(epochs):
+        err = _sigmoid(_logits(weights, bias, features, n)) - targets
+        grad = np.bincount(cols, weights=values * err[rows], minlength=num_features) / n + l2 * weights
+        grad_sq += grad**2
+        weights -= lr * grad / np.sqrt(grad_sq)
+        bias_grad = err.mean()
+        bias_sq += bias_grad**2
+        bias -= lr * bias_grad / np.sqrt(bias_sq)
+    return weights.astype(np.float32), float(bias)
+
+
+def calibrate_threshold(probs: np.ndarray, positives: np.ndarray, max_miss: float) -> float:
+    """
+    Threshold terbesar sehingga paling banyak max_miss dari panggilan positif
+    (penipuan menurut label atau Sailor2) punya probabilitas di bawahnya.
+    """
+    pos = np.sort(probs[positives])
+    if len(pos) == 0:
+        return 0.0
+    return float(pos[int(np.floor(max_miss * len(pos)))])
+
+
+def save(path: str, weights: np.ndarray, bias: float, threshold: float, report: dict):
+    np.savez_compressed(path, weights=weights, bias=bias, threshold=threshold, report=json.dumps(report))
+
+
+def load_prefilter(path: str = PREFILTER_PATH):
+    data = np.load(path)
+    with open(path, "rb") as f:
+        file_hash = content_hash(f.read())[:12]
+    threshold = float(PREFILTER_THRESHOLD) if PREFILTER_THRESHOLD else float(data["threshold"])
+    return SimpleNamespace(
+        weights=data["weights"],
+        bias=float(data["bias"]),
+        threshold=threshold,
+        num_features=len(data["weights"]),
+        # Dipakai di key cache verdict supaya hasil yang melewati pre-filter
+        # tidak tertukar dengan hasil Sailor2 murni
+        model_id=f"prefilter-{file_hash}@{threshold:.4f}",
+    )
+
+# Model di-load sekali saja, saat pertama kali dipakai
+prefilter = register("prefilter", load_prefilter)
+
+
+def model_id() -> str:
+    return prefilter.get().model_id
+
+
+def predict_proba(transcripts: list) -> np.ndarray:
+    """Probabilitas penipuan menurut pre-filter untuk satu batch transkrip."""
+    m = prefilter.get()
+    with telemetry.span("prefilter.score", batch=len(transcripts)):
+        features = featurize(transcripts, m.num_features)
+        return _sigmoid(_logits(m.weights, m.bias, features, len(transcripts)))
+
+
+def predict_gated(transcripts: list, predict_batch) -> list:
+    """
+    Jalankan pre-filter lebih dulu; transkrip yang jelas bukan penipuan
+    (probabilitas di bawah threshold) langsung diberi verdict 0, sisanya
+    diteruskan ke predict_batch (mis. predict_fraud_sailor2_batch).
+    Args:
+        transcripts: list transkrip (string)
+        predict_batch: fungsi list transkrip -> list hasil
+    Returns:
+        list of dict seperti predict_fraud_sailor2; hasil dari pre-filter
+        memiliki 'prefilter': True dan 'fraud_prob' dari pre-filter
+    """
+    m = prefilter.get()
+    probs = predict_proba(transcripts)
+    passed = [i for i, prob in enumerate(probs) if prob >= m.threshold]
+    telemetry.count("prefilter_skipped", len(transcripts) - len(passed))
+    telemetry.count("prefilter_passed", len(passed))
+    results = [
+        {"fraud": 0, "raw_pred": "prefilter", "fraud_prob": float(prob), "prefilter": True}
+        for prob in probs
+    ]
+    if passed:
+        for i, result in zip(passed, predict_batch([transcripts[i] for i in passed])):
+            results[i] = result
+    return results
+
+
+def load_teacher(path: str) -> dict:
+    """Probabilitas penipuan Sailor2 per file dari output utils.batch_score."""
+    teacher = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            sailor2 = record.get("sailor2")
+            if "error" in record or not sailor2 or sailor2.get("prefilter"):
+                continue
+            teacher[record["id"]] = float(sailor2.get("fraud_prob", sailor2["fraud"]))
+    return teacher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="dataset.csv dari create_dataset.py (file,label,transcription)")
+    parser.add_argument("--teacher", help="JSONL utils.batch_score berisi verdict Sailor2 per file")
+    parser.add_argument("--teacher-weight", type=float, default=0.5,
+                        help="Bobot verdict Sailor2 di target (sisanya label)")
+    parser.add_argument("--output", default=PREFILTER_PATH)
+    parser.add_argument("--max-miss", type=float, default=0.01,
+                        help="Proporsi maksimum panggilan penipuan yang boleh tersaring")
+    parser.add_argument("--num-features", type=int, default=NUM_FEATURES)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--val-fraction", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.dataset, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("transcription")]
+    transcripts = [row["transcription"] for row in rows]
+    labels = np.array([int(row["label"]) for row in rows], dtype=np.float64)
+    teacher = load_teacher(args.teacher) if args.teacher else {}
+    teacher_probs = np.array([teacher.get(row["file"], np.nan) for row in rows])
+    has_teacher = ~np.isnan(teacher_probs)
+    logging.info(f"{len(rows)} transkrip, {int(has_teacher.sum())} dengan verdict Sailor2")
+
+    targets = labels.copy()
+    targets[has_teacher] = ((1 - args.teacher_weight) * labels[has_teacher]
+                            + args.teacher_weight * teacher_probs[has_teacher])
+    # Panggilan yang tidak boleh tersaring: penipuan menurut label atau Sailor2
+    positives = (labels == 1) | (has_teacher & (np.nan_to_num(teacher_probs) >= 0.5))
+
+    order = np.random.default_rng(args.seed).permutation(len(rows))
+    n_val = max(1, int(len(rows) * args.val_fraction))
+    val, fit = order[:n_val], order[n_val:]
+
+    weights, bias = train([transcripts[i] for i in fit], targets[fit], args.num_features, args.epochs)
+    val_probs = _sigmoid(_logits(weights, bias, featurize([transcripts[i] for i in val], args.num_features), len(val)))
+    threshold = calibrate_threshold(val_probs, positives[val], args.max_miss)
+    skipped = val_probs < threshold
+    report = {
+        "num_train": int(len(fit)),
+        "num_val": int(len(val)),
+        "val_accuracy": float(((val_probs >= 0.5) == (labels[val] == 1)).mean()),
+        "val_teacher_agreement": float(((val_probs >= 0.5) == positives[val])[has_teacher[val]].mean())
+        if has_teacher[val].any() else None,
+        "threshold": threshold,
+        "val_skip_rate": float(skipped.mean()),
+        "val_fraud_missed": int((skipped & positives[val]).sum()),
+    }
+    # Model akhir dilatih ulang dengan semua data; threshold dari split validasi
+    weights, bias = train(transcripts, targets, args.num_features, args.epochs)
+    save(args.output, weights, bias, threshold, report)
+    logging.info(f"Pre-filter disimpan ke {args.output}: {json.dumps(report)}")
+
+
+if __name__ == "__main__":
+    main()
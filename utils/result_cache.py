@@ -0,0 +1,87 @@
+# utils/result_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 dari isi file, dipakai sebagai key cache."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache LRU untuk hasil analisis, dengan batas jumlah entri.
+    Jika persist_dir diisi, setiap entri juga disimpan sebagai file JSON
+    sehingga tetap tersedia setelah proses di-restart.
+    Nilai yang disimpan harus bisa di-serialize ke JSON.
+    """
+
+    def __init__(self, max_entries: int = 128, persist_dir: str = None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _load_index(self):
+        # Urutkan dari yang paling lama dipakai agar urutan LRU tetap terjaga
+        files = [f for f in os.scandir(self.persist_dir) if f.name.endswith(".json")]
+        for entry in sorted(files, key=lambda f: f.stat().st_mtime):
+            self._entries[entry.name[:-len(".json")]] = None
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            if self.persist_dir:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            value = self._entries[key]
+            if value is None and self.persist_dir:
+                # Entri yang baru ada di disk: baca sekali lalu simpan di memori
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        value = json.load(f)
+                except (OSError, ValueError):
+                    del self._entries[key]
+                    self.misses += 1
+                    return None
+                self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.persist_dir:
+                os.utime(self._path(key))
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.persist_dir:
+                tmp_path = self._path(key) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(key))
+            self._evict()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,188 @@
+"""
+HTTP service untuk deteksi penipuan, dipakai backend telephony tanpa UI.
+
+Endpoint:
+    POST /v1/score/transcript  JSON {"transcript": "..."} -> hasil Sailor2
+    POST /v1/score/audio       body = isi file audio (wav/mp3/aac/...) ->
+                               transkrip, Sailor2 dan Qwen2-Audio
+    GET  /health               status load model dan antrian
+    GET  /metrics              span dan counter model (format Prometheus)
+
+Request ke tiap model diantrikan dan digabung menjadi micro-batch
+(lihat utils.micro_batcher). Jika antrian penuh, request ditolak dengan
+503; jika hasil tidak siap dalam SERVER_REQUEST_TIMEOUT detik, 504.
+
+Contoh:
+    python -m utils.server --port 8000
+    curl -X POST --data-binary @audio-testing/voice_481914.aac localhost:8000/v1/score/audio
+"""
+import argparse
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from utils import model_registry, telemetry
+from utils.audio_processing import decode_audio
+from utils.micro_batcher import MicroBatcher, QueueFullError
+from utils.prefilter import PREFILTER_ENABLED
+
+# Ukuran batch maksimum dan waktu tunggu maksimum sebelum batch dikirim
+SERVER_SAILOR2_BATCH = int(os.getenv("SERVER_SAILOR2_BATCH", "8"))
+SERVER_QWEN2_BATCH = int(os.getenv("SERVER_QWEN2_BATCH", "4"))
+SERVER_MAX_WAIT_MS = float(os.getenv("SERVER_MAX_WAIT_MS", "20"))
+# Panjang antrian per model; request di atas ini langsung ditolak (503)
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "64"))
+# Batas waktu total per request dalam detik (504)
+SERVER_REQUEST_TIMEOUT = float(os.getenv("SERVER_REQUEST_TIMEOUT", "60"))
+# Matikan Qwen2-Audio untuk menghemat memori (endpoint audio hanya jalur teks)
+SERVER_ENABLE_QWEN2 = os.getenv("SERVER_ENABLE_QWEN2", "1") == "1"
+
+MODELS = ["whisper", "sailor2"] + (["qwen2"] if SERVER_ENABLE_QWEN2 else [])
+
+
+class TranscriptRequest(BaseModel):
+    transcript: str
+
+
+def _transcribe_batch(audios: list) -> list:
+    from utils.model_whisper import transcribe_audio
+
+    # Whisper belum punya jalur batch; batcher tetap dipakai untuk antrian dan backpressure
+    return [transcribe_audio(audio) for audio in audios]
+
+
+def _sailor2_batch(transcripts: list) -> list:
+    from utils.model_sailor2 import predict_fraud_sailor2_batch
+
+    def run(texts):
+        return predict_fraud_sailor2_batch(texts, batch_size=SERVER_SAILOR2_BATCH)
+    if PREFILTER_ENABLED:
+        from utils.prefilter import predict_gated
+
+        return predict_gated(transcripts, run)
+    return run(transcripts)
+
+
+def _qwen2_batch(audios: list) -> list:
+    from utils.model_qwen2 import predict_fraud_qwen2_batch
+
+    return predict_fraud_qwen2_batch(audios, batch_size=SERVER_QWEN2_BATCH)
+
+
+def create_batchers() -> dict:
+    batchers = {
+        "whisper": MicroBatcher("whisper", _transcribe_batch, 1, SERVER_MAX_WAIT_MS, SERVER_MAX_QUEUE),
+        "sailor2": MicroBatcher("sailor2", _sailor2_batch, SERVER_SAILOR2_BATCH, SERVER_MAX_WAIT_MS, SERVER_MAX_QUEUE),
+    }
+    if SERVER_ENABLE_QWEN2:
+        batchers["qwen2"] = MicroBatcher("qwen2", _qwen2_batch, SERVER_QWEN2_BATCH, SERVER_MAX_WAIT_MS, SERVER_MAX_QUEUE)
+    return batchers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.batchers = create_batchers()
+    for batcher in app.state.batchers.values():
+        batcher.start()
+    # Model di-load di background; /health melaporkan "loading" sampai selesai
+    app.state.warmup = asyncio.create_task(asyncio.to_thread(model_registry.warmup, *MODELS))
+    yield
+    for batcher in app.state.batchers.values():
+        await batcher.stop()
+
+
+app = FastAPI(title="Fraud Call Detector", lifespan=lifespan)
+
+
+async def _submit(request: Request, model: str, item, deadline: float):
+    try:
+        return await request.app.state.batchers[model].submit(item, timeout=max(deadline - time.monotonic(), 0))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timeout menunggu {model}")
+
+
+@app.get("/health")
+async def health(request: Request):
+    warmup = request.app.state.warmup
+    if not warmup.done():
+        status = "loading"
+    elif warmup.exception() is not None:
+        status = f"error: {warmup.exception()}"
+    else:
+        status = "ok"
+    return {
+        "status": status,
+        "load_times": model_registry.load_times(),
+        "queues": {name: b.stats() for name, b in request.app.state.batchers.items()},
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return telemetry.prometheus_text()
+
+
+@app.post("/v1/score/transcript")
+async def score_transcript(body: TranscriptRequest, request: Request):
+    deadline = time.monotonic() + SERVER_REQUEST_TIMEOUT
+    return {"sailor2": await _submit(request, "sailor2", body.transcript, deadline)}
+
+
+@app.post("/v1/score/audio")
+async def score_audio(request: Request):
+    deadline = time.monotonic() + SERVER_REQUEST_TIMEOUT
+    audio_bytes = await request.body()
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Body kosong; kirim isi file audio")
+    start = time.perf_counter()
+    try:
+        waveform = await asyncio.to_thread(decode_audio, audio_bytes)
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    decode_time = time.perf_counter() - start
+
+    async def text_branch():
+        transcript = await _submit(request, "whisper", waveform, deadline)
+        return transcript, await _submit(request, "sailor2", transcript, deadline)
+
+    branches = [asyncio.create_task(text_branch())]
+    if SERVER_ENABLE_QWEN2:
+        branches.append(asyncio.create_task(_submit(request, "qwen2", waveform, deadline)))
+    try:
+        results = await asyncio.gather(*branches)
+    except BaseException:
+        # Satu cabang gagal (503/504) atau request dibatalkan: batalkan cabang
+        # lain supaya itemnya dilewati batcher dan tidak memakai slot batch
+        for branch in branches:
+            branch.cancel()
+        await asyncio.gather(*branches, return_exceptions=True)
+        raise
+    transcript, sailor2 = results[0]
+    return {
+        "transcript": transcript,
+        "sailor2": sailor2,
+        "qwen2": results[1] if SERVER_ENABLE_QWEN2 else None,
+        "timings": {"decode": round(decode_time, 4), "total": round(time.perf_counter() - start, 4)},
+    }
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    # Satu worker: model di-load sekali dan batch digabung dalam satu proses
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
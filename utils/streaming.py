@@ -0,0 +1,205 @@
+# utils/streaming.py
+
+import socket
+
+import numpy as np
+
+from utils.audio_processing import SAMPLE_RATE, decode_audio
+from utils.model_whisper import transcribe_segments
+from utils.model_sailor2 import predict_fraud_sailor2
+from utils.lexicon import lexicon
+
+
+def _to_float32(chunk) -> np.ndarray:
+    """Terima PCM int16 (array atau bytes s16le) maupun float32, kembalikan float32."""
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        chunk = np.frombuffer(chunk, np.int16)
+    chunk = np.asarray(chunk)
+    if chunk.dtype == np.int16:
+        return chunk.astype(np.float32) / 32768.0
+    return chunk.astype(np.float32, copy=False)
+
+
+class StreamingFraudDetector:
+    """
+    Deteksi fraud bertahap untuk panggilan yang masih berlangsung.
+
+    Audio masuk per chunk (PCM mono 16 kHz). Setiap step_seconds, Whisper
+    mentranskripsi jendela audio yang belum "dikunci" (maks. window_seconds).
+    Segmen yang sudah lengkap dikunci ke transkrip sehingga tidak perlu
+    ditranskripsi ulang. Setiap score_every_seconds, transkrip yang terus
+    bertambah dinilai ulang dengan Sailor2 (mode "windowed") dan probabilitas
+    fraud terbaru dikirim sebagai event. Event "alert" dikirim sekali saat
+    probabilitas melewati threshold.
+
+    Jika use_lexicon, setiap segmen yang dikunci juga dipindai utils.lexicon
+    secara inkremental; pola baru dikirim sebagai event "lexicon" dan skor
+    risikonya ikut di event "score"/"final".
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        step_seconds: float = 5.0,
+        score_every_seconds: float = 10.0,
+        threshold: float = 0.8,
+        language: str = "indonesian",
+        use_lexicon: bool = True,
+    ):
+        self.window_seconds = window_seconds
+        self.step_seconds = step_seconds
+        self.score_every_seconds = score_every_seconds
+        self.threshold = threshold
+        self.language = language
+
+        self._buffer = np.zeros(0, dtype=np.float32)  # audio yang belum dikunci
+        self._committed = []  # teks segmen yang sudah dikunci
+        self._pending = ""  # teks sementara dari jendela saat ini
+        self._untranscribed = 0.0
+        self._unscored_text = False
+        self._last_score_at = 0.0
+        self.elapsed = 0.0
+        self.fraud_prob = None
+        self.alerted = False
+        self._lexicon = lexicon.get().scanner() if use_lexicon else None
+
+    @property
+    def transcript(self) -> str:
+        return " ".join(t for t in self._committed + [self._pending] if t).strip()
+
+    def _scan_committed(self, texts) -> list:
+        """Pindai teks yang baru dikunci; returns event "lexicon" jika ada pola baru."""
+        if self._lexicon is None:
+            return []
+        matches = []
+        for text in texts:
+            if text:
+                matches.extend(self._lexicon.feed(text + " "))
+        if not matches:
+            return []
+        return [{"type": "lexicon", "t": round(self.elapsed, 2), "matches": matches, "risk": self._lexicon.risk}]
+
+    def _transcribe_window(self) -> list:
+        buffer_seconds = len(self._buffer) / SAMPLE_RATE
+        segments = transcribe_segments(self._buffer, language=self.language)
+        self._untranscribed = 0.0
+
+        # Jika step berikutnya akan melewati ukuran jendela, kunci semua segmen
+        # kecuali yang terakhir (mungkin masih terpotong) lalu geser jendela.
+        if buffer_seconds + self.step_seconds > self.window_seconds and segments:
+            keep = segments[-1:] if len(segments) > 1 else []
+            done = segments[:len(segments) - len(keep)]
+            committed = [seg["text"].strip() for seg in done]
+            self._committed.extend(committed)
+            events = self._scan_committed(committed)
+            cut = int(done[-1]["end"] * SAMPLE_RATE) if keep else len(self._buffer)
+            self._buffer = self._buffer[cut:]
+            segments = keep
+        else:
+            events = []
+            if buffer_seconds + self.step_seconds > self.window_seconds:
+                # Tanpa segmen (hening/musik tunggu): buang audio lama supaya
+                # buffer tidak tumbuh terus dan tidak ditranskripsi ulang setiap step
+                keep_samples = max(int((self.window_seconds - self.step_seconds) * SAMPLE_RATE), 0)
+                self._buffer = self._buffer[len(self._buffer) - keep_samples:]
+        self._pending = " ".join(seg["text"].strip() for seg in segments)
+        self._unscored_text = True
+        return events
+
+    def _score(self) -> list:
+        self._last_score_at = self.elapsed
+        self._unscored_text = False
+        if not self.transcript:
+            return []
+        # Mode windowed: transkrip panggilan panjang tidak dipotong di max_seq_length,
+        # jadi ucapan terbaru dan kalimat penutup prompt tetap ikut dinilai
+        result = predict_fraud_sailor2(self.transcript, mode="windowed")
+        self.fraud_prob = result["fraud_prob"]
+        events = [{
+            "type": "score",
+            "t": round(self.elapsed, 2),
+            "fraud_prob": self.fraud_prob,
+            "transcript": self.transcript,
+        }]
+        if self._lexicon is not None:
+            events[0]["lexicon_risk"] = self._lexicon.risk
+        if not self.alerted and self.fraud_prob >= self.threshold:
+            self.alerted = True
+            events.append({"type": "alert", "t": round(self.elapsed, 2), "fraud_prob": self.fraud_prob})
+        return events
+
+    def feed(self, chunk) -> list:
+        """Tambahkan satu chunk audio. Returns list event yang terjadi (bisa kosong)."""
+        chunk = _to_float32(chunk)
+        self._buffer = np.concatenate([self._buffer, chunk])
+        seconds = len(chunk) / SAMPLE_RATE
+        self.elapsed += seconds
+        self._untranscribed += seconds
+
+        events = []
+        if self._untranscribed >= self.step_seconds:
+            events.extend(self._transcribe_window())
+        if self._unscored_text and self.elapsed - self._last_score_at >= self.score_every_seconds:
+            events.extend(self._score())
+        return events
+
+    def finish(self) -> list:
+        """Panggilan selesai: transkripsi sisa audio dan lakukan penilaian akhir."""
+        events = self._transcribe_window() if self._untranscribed > 0 else []
+        # Teks sementara terakhir menjadi final
+        events.extend(self._scan_committed([self._pending]))
+        if self._lexicon is not None:
+            self._lexicon.finish()
+        events.extend(self._score() if self._unscored_text else [])
+        events.append({
+            "type": "final",
+            "t": round(self.elapsed, 2),
+            "fraud_prob": self.fraud_prob,
+            "transcript": self.transcript,
+        })
+        if self._lexicon is not None:
+            events[-1]["lexicon"] = self._lexicon.result()
+        return events
+
+
+def run_stream(chunks, detector: StreamingFraudDetector = None, stop_on_alert: bool = True):
+    """
+    Alirkan chunk dari generator ke detector dan yield setiap event.
+    Jika stop_on_alert, berhenti begitu event "alert" muncul (early exit).
+    """
+    detector = detector or StreamingFraudDetector()
+    for chunk in chunks:
+        for event in detector.feed(chunk):
+            yield event
+            if stop_on_alert and event["type"] == "alert":
+                return
+    yield from detector.finish()
+
+
+def pcm_chunks_from_file(path: str, chunk_seconds: float = 1.0):
+    """Generator chunk float32 16 kHz dari file audio, untuk simulasi/benchmark."""
+    audio = decode_audio(path)
+    step = int(chunk_seconds * SAMPLE_RATE)
+    for start in range(0, len(audio), step):
+        yield audio[start:start + step]
+
+
+def pcm_chunks_from_socket(host: str, port: int, chunk_seconds: float = 1.0):
+    """
+    Generator chunk dari koneksi TCP yang mengirim PCM s16le mono 16 kHz mentah
+    (pengganti lokal untuk SIP tap). Berhenti saat koneksi ditutup.
+    """
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * 2
+    with socket.create_connection((host, port)) as conn:
+        pending = b""
+        while True:
+            data = conn.recv(chunk_bytes - len(pending))
+            if not data:
+                break
+            pending += data
+            if len(pending) == chunk_bytes:
+                yield pending
+                pending = b""
+        if pending:
+            # Buang byte ganjil agar tetap kelipatan sampel int16
+            yield pending[:len(pending) - len(pending) % 2]
@@ -0,0 +1,116 @@
+# utils/telemetry.py
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Tulis setiap span sebagai satu baris JSON ke file ini (kosong = nonaktif)
+TELEMETRY_JSONL = os.getenv("TELEMETRY_JSONL")
+# Jika diisi, setiap request run_analysis dibungkus torch.profiler dan
+# trace Chrome (buka di chrome://tracing / Perfetto) disimpan di folder ini
+TORCH_PROFILE_DIR = os.getenv("TORCH_PROFILE_DIR")
+
+_lock = threading.Lock()
+# nama span -> [jumlah, total detik, maksimum detik]
+_spans = {}
+# nama counter -> nilai
+_counters = {}
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Ukur durasi satu bagian hot path, mis. span("sailor2.prefill").
+    Durasi diakumulasi per nama (lihat snapshot/prometheus_text) dan, jika
+    TELEMETRY_JSONL diisi, ditulis sebagai satu baris JSON beserta attrs.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        with _lock:
+            stats = _spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            if TELEMETRY_JSONL:
+                record = {"ts": round(time.time(), 3), "span": name, "duration_ms": round(duration * 1000, 3), **attrs}
+                with open(TELEMETRY_JSONL, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+
+def count(name: str, value: float = 1):
+    """Tambah counter, mis. count("sailor2_tokens_in", 512)."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "spans": {
+                name: {"count": n, "total_s": round(total, 6), "mean_ms": round(total / n * 1000, 3),
+                       "max_ms": round(peak * 1000, 3)}
+                for name, (n, total, peak) in _spans.items()
+            },
+            "counters": dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def prometheus_text(prefix: str = "fraud") -> str:
+    """Semua span dan counter dalam format teks Prometheus."""
+    with _lock:
+        spans = {name: list(stats) for name, stats in _spans.items()}
+        counters = dict(_counters)
+    lines = [
+        f"# HELP {prefix}_span_seconds Durasi bagian pipeline inference",
+        f"# TYPE {prefix}_span_seconds summary",
+    ]
+    for name, (n, total, _) in sorted(spans.items()):
+        lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {n}')
+        lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {total:.6f}')
+    lines.append(f"# TYPE {prefix}_span_seconds_max gauge")
+    for name, (_, _, peak) in sorted(spans.items()):
+        lines.append(f'{prefix}_span_seconds_max{{span="{name}"}} {peak:.6f}')
+    for name, value in sorted(counters.items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def profiling_enabled() -> bool:
+    return bool(TORCH_PROFILE_DIR)
+
+
+@contextmanager
+def profile(name: str, output_dir: str = None):
+    """
+    Bungkus satu request dengan torch.profiler jika output_dir diisi
+    (default: env TORCH_PROFILE_DIR); selain itu tidak melakukan apa-apa.
+    Profiler hanya merekam op di thread pemanggil, jadi kerja model di
+    dalamnya harus berjalan di thread yang sama (lihat profiling_enabled).
+    """
+    output_dir = TORCH_PROFILE_DIR if output_dir is None else output_dir
+    if not output_dir:
+        yield
+        return
+    import torch
+    from torch.profiler import ProfilerActivity
+
+    activities = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if torch.cuda.is_available() else [])
+    os.makedirs(output_dir, exist_ok=True)
+    with torch.profiler.profile(activities=activities, record_shapes=True) as prof:
+        yield
+    path = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    prof.export_chrome_trace(path)
+    logging.info(f"Trace torch.profiler disimpan ke {path}")